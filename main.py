@@ -1,26 +1,55 @@
 import warnings
 import sys
 import os
-import re
+import functools
+import json
+import threading
+import time
+import traceback
 
 warnings.filterwarnings("ignore")
 os.environ['PYTHONWARNINGS'] = 'ignore::RuntimeWarning'
 
 import subprocess
-from src.assistant import JarvisAssistant
+import requests
+from src import config
+
+# Line editing and up-arrow history for input() (not available on Windows)
+try:
+    import readline
+except ImportError:
+    pass
+
+# Piped input gets nothing from line editing, so it is read directly
+INTERACTIVE_STDIN = sys.stdin is not None and sys.stdin.isatty()
 
 # Try to import voice system
 VOICE_AVAILABLE = False
 try:
-    from src.voice import VoiceAssistant, list_microphones
+    from src.voice import VoiceAssistant, list_microphones, microphone_device_count
     VOICE_AVAILABLE = True
 except ImportError:
     pass
 
 
-def print_help():
-    """Show available commands"""
-    help_text = """
+@functools.lru_cache(maxsize=1)
+def verify_ollama():
+    """Check the Ollama server is reachable - HTTP ping first, CLI only as a fallback"""
+    try:
+        if requests.get(f"{config.OLLAMA_HOST}/api/tags", timeout=1.0).ok:
+            return True
+    except requests.RequestException:
+        pass
+    
+    # Server not answering - is Ollama installed at all?
+    try:
+        subprocess.run(["ollama", "list"], capture_output=True, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+
+HELP_TEXT = """
 Available Commands:
   news               - Get today's news summary from reputable sources
   more [#/topic]     - Get details on a news topic (e.g., 'more 5' or 'more bitcoin')
@@ -39,43 +68,398 @@ Available Commands:
 App Launcher:
   open [app]         - Open an application (e.g., 'open google', 'open vscode')
 """
-    
-    if VOICE_AVAILABLE:
-        help_text += """
+
+if VOICE_AVAILABLE:
+    HELP_TEXT += """
 Voice Commands:
   voice on/off       - Toggle voice responses in text mode
   voice mode         - Enter continuous voice interaction mode
   wake word mode     - Always-listening mode (say 'Jarvis' to activate)
   test voice         - Test voice system
 """
-    
-    print(help_text)
 
-
-def main():
-    print("""
+BANNER = """
     ╔══════════════════════════════════════╗
     ║              JARVIS AI                ║
     ╚══════════════════════════════════════╝
-    """)
+    
+"""
+
+# Printed after every chat turn
+SEP = "\n" + "-" * 60 + "\n"
+
+# Personality trait bars, indexed by value // 5 (traits run 0-100)
+BARS = ['█' * i + '░' * (20 - i) for i in range(21)]
+
+
+def preload_assistant():
+    """Import the assistant stack ahead of use - errors resurface on the real import"""
+    try:
+        import src.assistant
+    except Exception:
+        pass
+
+
+def read_prompt(prompt="\nYou: "):
+    """Read one line of user input - None at end of input"""
+    if INTERACTIVE_STDIN:
+        try:
+            return input(prompt)
+        except EOFError:
+            return None
+    
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    return line or None
+
+
+def print_help():
+    """Show available commands"""
+    sys.stdout.write(HELP_TEXT + "\n")
+
+
+# Chosen microphone, reused until the number of audio devices changes
+MIC_CACHE_FILE = "./jarvis_data/mic_cache.json"
+
+
+def load_mic_cache():
+    """Load the cached microphone choice, or None"""
+    try:
+        with open(MIC_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_mic_cache(device_count, index, name):
+    """Remember the chosen microphone for the next start"""
+    try:
+        os.makedirs(os.path.dirname(MIC_CACHE_FILE), exist_ok=True)
+        with open(MIC_CACHE_FILE, 'w') as f:
+            json.dump({"device_count": device_count, "index": index, "name": name}, f, indent=2)
+    except OSError:
+        pass
+
+
+def select_microphone(show_all=False):
+    """Pick a webcam/camera mic (else the first one) - skips enumeration when the cache is valid"""
+    device_count = microphone_device_count()
+    
+    cache = load_mic_cache()
+    if not show_all and cache and device_count is not None and cache.get('device_count') == device_count:
+        print(f"\nUsing microphone: {cache['name']}")
+        return cache['index']
+    
+    if show_all:
+        print("\nAvailable microphones:")
+    mic_list = list_microphones(show=show_all)
+    if not mic_list:
+        return None
+    
+    # Look for webcam or default
+    for idx, name in mic_list:
+        if 'webcam' in name.lower() or 'camera' in name.lower():
+            print(f"\nUsing microphone: {name}")
+            break
+    else:
+        idx, name = mic_list[0]
+        print(f"\nUsing default microphone: {name}")
+    
+    if device_count is not None:
+        save_mic_cache(device_count, idx, name)
+    return idx
+
+
+# Returned by a command handler to leave the main loop
+EXIT = "exit"
+
+
+def cmd_exit(assistant, voice_assistant, rest, user_input):
+    """exit / quit / bye / goodbye"""
+    if rest:
+        return False
+    assistant.shutdown()
+    if voice_assistant:
+        voice_assistant.shutdown()
+    return EXIT
+
+
+def cmd_help(assistant, voice_assistant, rest, user_input):
+    """help"""
+    if rest:
+        return False
+    print_help()
+    return True
+
+
+def cmd_list(assistant, voice_assistant, rest, user_input):
+    """list apps"""
+    if rest != 'apps':
+        return False
+    print("\nAvailable Applications:")
+    for app_info in assistant.app_launcher.list_apps():
+        print(f"  {app_info}")
+    return True
+
+
+def cmd_voice(assistant, voice_assistant, rest, user_input):
+    """voice on / voice off / voice mode"""
+    if rest == 'on':
+        if voice_assistant:
+            voice_assistant.voice_enabled = True
+            print("Voice responses enabled (hybrid mode)")
+            if voice_assistant.voice:
+                voice_assistant.voice.speak("Voice responses enabled, sir.", wait=True)
+        else:
+            print("Voice system not available")
+        return True
+    
+    if rest == 'off':
+        if voice_assistant:
+            if voice_assistant.voice:
+                voice_assistant.voice.speak("Voice responses disabled, sir.", wait=True)
+            voice_assistant.voice_enabled = False
+            print("Voice responses disabled")
+        else:
+            print("Voice system not available")
+        return True
+    
+    if rest == 'mode' and voice_assistant:
+        print("\nEntering Voice Mode...")
+        print("Tip: Say 'exit' or 'goodbye' to return to text mode\n")
+        voice_assistant.voice_chat_loop()
+        print("\nReturned to text mode")
+        return True
+    
+    return False
+
+
+def cmd_wake(assistant, voice_assistant, rest, user_input):
+    """wake word mode / wake mode"""
+    if rest not in ('word mode', 'mode') or not voice_assistant:
+        return False
+    print("\nEntering Wake Word Mode...")
+    print("Tip: Say 'Jarvis' followed by your command\n")
+    voice_assistant.wake_word_mode()
+    print("\nReturned to text mode")
+    return True
+
+
+def cmd_test(assistant, voice_assistant, rest, user_input):
+    """test voice"""
+    if rest != 'voice' or not voice_assistant:
+        return False
+    print("\nTesting voice system...")
+    voice_assistant.voice.speak("Voice test. I am Jarvis, sir.", wait=True)
+    print("Now say something:")
+    text = voice_assistant.voice.listen(timeout=5)
+    if text:
+        print(f"Recognized: {text}")
+        voice_assistant.voice.speak(f"You said: {text}", wait=True)
+    return True
+
+
+def cmd_stats(assistant, voice_assistant, rest, user_input):
+    """stats"""
+    if rest:
+        return False
+    stats = assistant.get_memory_stats()
+    
+    # Build the whole block and write it once
+    lines = [
+        "\nMemory Statistics:",
+        f"   Total facts stored: {stats['total_facts']}",
+        f"   Learned this session: {stats['learned_this_session']}",
+    ]
+    
+    if stats.get('by_category'):
+        lines.append("\nFacts by Category:")
+        for category, count in stats['by_category'].items():
+            lines.append(f"      {category}: {count}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    return True
+
+
+def cmd_personality(assistant, voice_assistant, rest, user_input):
+    """personality"""
+    if rest:
+        return False
+    if hasattr(assistant, 'personality') and assistant.personality:
+        personality = assistant.personality.get_personality_summary()
+        lines = [
+            "\nPersonality Status:",
+            f"   Development: {personality['development_stage']}",
+            f"   Total interactions: {personality['interactions']}",
+            "\nCurrent Traits:",
+        ]
+        
+        for trait, value in personality['traits'].items():
+            bar = BARS[max(0, min(20, value // 5))]
+            lines.append(f"   {trait.capitalize():12} [{bar}] {value}/100")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+    else:
+        print("\nPersonality system not initialized.")
+    return True
+
+
+def cmd_set(assistant, voice_assistant, rest, user_input):
+    """set [trait] [value]"""
+    if not rest:
+        return False
+    if hasattr(assistant, 'personality') and assistant.personality:
+        parts = user_input.split()
+        if len(parts) >= 3:
+            trait = parts[1]
+            value = parts[2]
+            success, message = assistant.personality.adjust_trait(trait, value)
+            print(f"\n{message}")
+        else:
+            print("\nUsage: set [trait] [value]")
+    else:
+        print("\nPersonality system not initialized.")
+    return True
+
+
+def cmd_show(assistant, voice_assistant, rest, user_input):
+    """show facts"""
+    if rest != 'facts':
+        return False
+    storage = assistant.memory.storage
+    facts = storage.get_recent_facts(10)
+    if facts:
+        print(f"\nStored Facts ({storage.count_facts()} total):")
+        for i, fact in enumerate(facts, 1):
+            print(f"   {i}. [{fact['category']}] {fact['fact']}")
+    else:
+        print("\nNo facts stored yet!")
+    return True
+
+
+def cmd_export(assistant, voice_assistant, rest, user_input):
+    """export"""
+    if rest:
+        return False
+    try:
+        filepath = assistant.export_for_finetuning()
+        print(f"\nTraining data exported to: {filepath}")
+    except Exception as e:
+        print(f"\nExport failed: {e}")
+    return True
+
+
+def cmd_learn(assistant, voice_assistant, rest, user_input):
+    """learn on / learn off"""
+    if not rest:
+        return False
+    command = rest.split()[0]
+    if command == 'on':
+        assistant.toggle_learning(True)
+    elif command == 'off':
+        assistant.toggle_learning(False)
+    else:
+        print("Usage: 'learn on' or 'learn off'")
+    return True
+
+
+def cmd_remember(assistant, voice_assistant, rest, user_input):
+    """remember [something]"""
+    if not rest:
+        return False
+    fact = user_input[9:].strip()
+    if fact:
+        success = assistant.memory.remember_fact_manually(fact, "user_specified")
+        if success:
+            print(f"[*] Remembered: {fact}")
+        else:
+            print(f"Already knew that!")
+    else:
+        print("Usage: remember [something to remember]")
+    return True
+
+
+def cmd_clear(assistant, voice_assistant, rest, user_input):
+    """clear"""
+    if rest:
+        return False
+    assistant.conversation_history.clear()
+    print("Conversation history cleared (memories preserved)")
+    return True
+
+
+# First word of the input -> handler; a handler returns False to let the input fall through to chat
+COMMANDS = {
+    'exit': cmd_exit,
+    'quit': cmd_exit,
+    'bye': cmd_exit,
+    'goodbye': cmd_exit,
+    'help': cmd_help,
+    'list': cmd_list,
+    'voice': cmd_voice,
+    'wake': cmd_wake,
+    'test': cmd_test,
+    'stats': cmd_stats,
+    'personality': cmd_personality,
+    'set': cmd_set,
+    'show': cmd_show,
+    'export': cmd_export,
+    'learn': cmd_learn,
+    'remember': cmd_remember,
+    'clear': cmd_clear,
+}
+
+
+def launch_app(args):
+    """python main.py open [--exec] <app> - open an app without starting the assistant"""
+    from src.app_launcher import AppLauncher
+    
+    replace_self = '--exec' in args
+    name = " ".join(arg for arg in args if arg != '--exec')
+    
+    launcher = AppLauncher()
+    app_name = launcher.extract_app_name(name) or name
+    success, message = launcher.open_app(app_name, replace_self=replace_self)
+    print(message)
+    return success
+
+
+def main():
+    # One-shot launch skips the assistant entirely
+    if len(sys.argv) > 2 and sys.argv[1] == 'open':
+        success = launch_app(sys.argv[2:])
+        sys.exit(0 if success else 1)
+    
+    sys.stdout.write(BANNER)
     
     # Check for voice mode flag
     voice_mode_start = '--voice' in sys.argv or '-v' in sys.argv
     wake_word_mode_start = '--wake' in sys.argv or '-w' in sys.argv or len(sys.argv) == 1  # Default to wake word mode
     
+    # Speech recognition backend: --asr google|whisper
+    asr_backend = config.ASR_BACKEND
+    if '--asr' in sys.argv:
+        asr_index = sys.argv.index('--asr') + 1
+        if asr_index < len(sys.argv):
+            asr_backend = sys.argv[asr_index]
+    
     # Verify Ollama
+    # Overlap the heavy imports with the Ollama check; the daemon thread won't delay a failed exit
+    threading.Thread(target=preload_assistant, daemon=True).start()
+    
     print("Checking Ollama installation...")
-    try:
-        subprocess.run(["ollama", "list"], capture_output=True, check=True)
+    if verify_ollama():
         print("Ollama found")
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    else:
         print("Error: Ollama not found. Install from https://ollama.ai")
         input("\nPress Enter to exit...")
         return
     
-    # Initialize assistant
+    # Initialize assistant - waits for the background import if it's still running
     print("Initializing Jarvis...")
     try:
+        from src.assistant import JarvisAssistant
         assistant = JarvisAssistant(debug=False)
         
         # Show initial stats
@@ -86,7 +470,6 @@ def main():
         
     except Exception as e:
         print(f"\nFailed to initialize: {e}")
-        import traceback
         traceback.print_exc()
         return
     
@@ -96,31 +479,20 @@ def main():
     
     if VOICE_AVAILABLE:
         try:
-            # List available microphones
-            print("\nAvailable microphones:")
-            mic_list = list_microphones()
-            
-            if mic_list:
-                # Look for webcam or default
-                default_index = None
-                for idx, name in mic_list:
-                    if 'webcam' in name.lower() or 'camera' in name.lower():
-                        default_index = idx
-                        print(f"\nUsing microphone: {name}")
-                        break
-                
-                if default_index is None and mic_list:
-                    default_index = mic_list[0][0]
-                    print(f"\nUsing default microphone: {mic_list[0][1]}")
-                
-                microphone_index = default_index
+            # Full device listing only with --list-mics
+            microphone_index = select_microphone(show_all='--list-mics' in sys.argv)
             
             voice_assistant = VoiceAssistant(
                 assistant, 
                 voice_enabled=True, 
                 voice_mode="hybrid",
-                microphone_index=microphone_index
+                microphone_index=microphone_index,
+                asr_backend=asr_backend,
+                whisper_model=config.WHISPER_MODEL,
+                whisper_compute_type=config.WHISPER_COMPUTE_TYPE,
+                porcupine_access_key=config.PORCUPINE_ACCESS_KEY
             )
+            voice_assistant.prewarm()
         except Exception as e:
             print(f"Warning: Voice system failed to initialize: {e}")
             print("Voice features will be disabled")
@@ -132,7 +504,6 @@ def main():
     if voice_assistant:
         print("\nVoice mode available.")
         print("Starting wake word mode...")
-        import time
         time.sleep(1)
         voice_assistant.wake_word_mode()
         assistant.shutdown()
@@ -140,186 +511,53 @@ def main():
     
     # Only show text mode prompt if no voice
     print("\nType 'help' for commands.")
-    print("\n" + "-" * 60)
+    sys.stdout.write(SEP)
     
     # Main conversation loop
     while True:
         try:
-            user_input = input("\nYou: ").strip()
-            
-            if not user_input:
-                continue
-            
-            # Exit commands
-            if user_input.lower() in ['exit', 'quit', 'bye', 'goodbye']:
+            line = read_prompt()
+            if line is None:
                 assistant.shutdown()
                 if voice_assistant:
                     voice_assistant.shutdown()
                 break
             
-            # Help command
-            if user_input.lower() == 'help':
-                print_help()
-                continue
-            
-            # List apps command
-            if user_input.lower() == 'list apps':
-                print("\nAvailable Applications:")
-                for app_info in assistant.app_launcher.list_apps():
-                    print(f"  {app_info}")
-                continue
-            
-            # Voice toggle commands
-            if user_input.lower() == 'voice on':
-                if voice_assistant:
-                    voice_assistant.voice_enabled = True
-                    print("Voice responses enabled (hybrid mode)")
-                    if voice_assistant.voice:
-                        voice_assistant.voice.speak("Voice responses enabled, sir.", wait=True)
-                else:
-                    print("Voice system not available")
-                continue
-            
-            if user_input.lower() == 'voice off':
-                if voice_assistant:
-                    if voice_assistant.voice:
-                        voice_assistant.voice.speak("Voice responses disabled, sir.", wait=True)
-                    voice_assistant.voice_enabled = False
-                    print("Voice responses disabled")
-                else:
-                    print("Voice system not available")
+            user_input = line.strip()
+            if not user_input:
                 continue
             
-            # Voice mode commands
-            if voice_assistant:
-                if user_input.lower() == 'voice mode':
-                    print("\nEntering Voice Mode...")
-                    print("Tip: Say 'exit' or 'goodbye' to return to text mode\n")
-                    voice_assistant.voice_chat_loop()
-                    print("\nReturned to text mode")
-                    continue
-                
-                if user_input.lower() in ['wake word mode', 'wake mode']:
-                    print("\nEntering Wake Word Mode...")
-                    print("Tip: Say 'Jarvis' followed by your command\n")
-                    voice_assistant.wake_word_mode()
-                    print("\nReturned to text mode")
+            # REPL commands - one casefold pass, then a dict lookup on the first word
+            verb, _, rest = user_input.casefold().partition(' ')
+            handler = COMMANDS.get(verb)
+            if handler:
+                result = handler(assistant, voice_assistant, rest.strip(), user_input)
+                if result == EXIT:
+                    break
+                if result:
                     continue
-                
-                if user_input.lower() == 'test voice':
-                    print("\nTesting voice system...")
-                    voice_assistant.voice.speak("Voice test. I am Jarvis, sir.", wait=True)
-                    print("Now say something:")
-                    text = voice_assistant.voice.listen(timeout=5)
-                    if text:
-                            print(f"Recognized: {text}")
-                            voice_assistant.voice.speak(f"You said: {text}", wait=True)
-                    continue
-            
-            # Stats command
-            if user_input.lower() == 'stats':
-                stats = assistant.get_memory_stats()
-                print(f"\nMemory Statistics:")
-                print(f"   Total facts stored: {stats['total_facts']}")
-                print(f"   Learned this session: {stats['learned_this_session']}")
-                
-                if stats.get('by_category'):
-                    print(f"\nFacts by Category:")
-                    for category, count in stats['by_category'].items():
-                        print(f"      {category}: {count}")
-                continue
-            
-            # Personality command
-            if user_input.lower() == 'personality':
-                if hasattr(assistant, 'personality') and assistant.personality:
-                    personality = assistant.personality.get_personality_summary()
-                    print(f"\nPersonality Status:")
-                    print(f"   Development: {personality['development_stage']}")
-                    print(f"   Total interactions: {personality['interactions']}")
-                    
-                    print(f"\nCurrent Traits:")
-                    for trait, value in personality['traits'].items():
-                        bar = '█' * (value // 5) + '░' * (20 - value // 5)
-                        print(f"   {trait.capitalize():12} [{bar}] {value}/100")
-                else:
-                    print("\nPersonality system not initialized.")
-                continue
-            
-            # Set trait command
-            if user_input.lower().startswith('set '):
-                if hasattr(assistant, 'personality') and assistant.personality:
-                    parts = user_input.split()
-                    if len(parts) >= 3:
-                        trait = parts[1]
-                        value = parts[2]
-                        success, message = assistant.personality.adjust_trait(trait, value)
-                        print(f"\n{message}")
-                    else:
-                        print("\nUsage: set [trait] [value]")
-                else:
-                    print("\nPersonality system not initialized.")
-                continue
             
-            # Show facts command
-            if user_input.lower() == 'show facts':
-                facts = assistant.memory.storage.get_all_facts()
-                if facts:
-                    print(f"\nStored Facts ({len(facts)} total):")
-                    for i, fact in enumerate(facts[-10:], 1):
-                        print(f"   {i}. [{fact['category']}] {fact['fact']}")
-                else:
-                    print("\nNo facts stored yet!")
-                continue
+            # Normal chat - text only, a working voice system runs wake word mode instead
+            sys.stdout.write("Jarvis: ")
+            sys.stdout.flush()
+            streamed = []
             
-            # Export command
-            if user_input.lower() == 'export':
-                try:
-                    filepath = assistant.export_for_finetuning()
-                    print(f"\nTraining data exported to: {filepath}")
-                except Exception as e:
-                    print(f"\nExport failed: {e}")
-                continue
-            
-            # Learn toggle command
-            if user_input.lower().startswith('learn '):
-                command = user_input.lower().split()[1]
-                if command == 'on':
-                    assistant.toggle_learning(True)
-                elif command == 'off':
-                    assistant.toggle_learning(False)
-                else:
-                    print("Usage: 'learn on' or 'learn off'")
-                continue
-            
-            # Remember command
-            if user_input.lower().startswith('remember '):
-                fact = user_input[9:].strip()
-                if fact:
-                    success = assistant.memory.remember_fact_manually(fact, "user_specified")
-                    if success:
-                        print(f"[*] Remembered: {fact}")
-                    else:
-                        print(f"Already knew that!")
-                else:
-                    print("Usage: remember [something to remember]")
-                continue
-            
-            # Clear conversation command
-            if user_input.lower() == 'clear':
-                assistant.conversation_history = []
-                print("Conversation history cleared (memories preserved)")
-                continue
+            def print_token(text):
+                streamed.append(text)
+                sys.stdout.write(text)
+                sys.stdout.flush()
             
-            # Normal chat
-            print("Jarvis: ", end="", flush=True)
-            response = assistant.chat(user_input)
-            print(response)
+            response = assistant.chat(user_input, on_token=print_token if config.STREAM_RESPONSES else None)
             
-            # Hybrid voice: Pass user query for smart voice selection
-            if voice_assistant and voice_assistant.voice_enabled:
-                voice_assistant.speak_response(response, user_query=user_input)
+            # Print the full response unless it was already streamed verbatim
+            if not streamed:
+                print(response)
+            elif "".join(streamed) != response:
+                print(f"\n{response}")
+            else:
+                print()
             
-            print("\n" + "-" * 60)
+            sys.stdout.write(SEP)
             
         except KeyboardInterrupt:
             print("\n\nInterrupted. Saving...")
@@ -329,7 +567,6 @@ def main():
             break
         except Exception as e:
             print(f"\nError: {str(e)}")
-            import traceback
             traceback.print_exc()
 
 
@@ -2,9 +2,22 @@
 Jarvis AI Assistant Package
 """
 
-from .assistant import JarvisAssistant
-from .llm import LLMHandler
-from .search import WebSearch
+import importlib
 
 __version__ = "2.0.0"
-__all__ = ["JarvisAssistant", "LLMHandler", "WebSearch"]
\ No newline at end of file
+__all__ = ["JarvisAssistant", "LLMHandler", "WebSearch"]
+
+# Exported classes are imported on first access, so `from src import config`
+# doesn't pull in the whole assistant stack
+_LAZY_EXPORTS = {
+    "JarvisAssistant": ".assistant",
+    "LLMHandler": ".llm",
+    "WebSearch": ".search",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
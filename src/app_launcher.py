@@ -1,10 +1,43 @@
 import subprocess
+import re
+import sys
+import functools
+import shutil
 import platform
 import os
 import json
+import shlex
+import threading
 import webbrowser
 import time
 
+# orjson is optional - several times faster than the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Whole words only, so "restart" or "brunch" don't count as a launch command
+OPEN_KEYWORDS = frozenset(['open', 'launch', 'start', 'run'])
+
+# Polite filler removed before looking for an app name
+FILLER_WORDS = re.compile(r"\b(?:please|can you|could you|would you|just|now)\b")
+
+# Commands using any of these still need a shell
+SHELL_METACHARACTERS = re.compile(r"[|&;<>()$`*?~{}\[\]]")
+
+
+@functools.lru_cache(maxsize=64)
+def split_command(command):
+    """argv tuple for a configured POSIX command, or None if it needs a shell"""
+    if SHELL_METACHARACTERS.search(command):
+        return None
+    try:
+        return tuple(shlex.split(command)) or None
+    except ValueError:
+        return None
+
 
 class AppLauncher:
     """Launch applications and websites with auto-focus"""
@@ -14,6 +47,19 @@ class AppLauncher:
         self.system = platform.system()
         self.apps = self._load_config()
         
+        # Resolved once - key of the launch command for this OS in each app config, and how to run it
+        if self.system == "Windows":
+            self.platform_key = "windows"
+            self._spawn = self._spawn_windows
+        elif self.system == "Darwin":
+            self.platform_key = "mac"
+            self._spawn = self._spawn_posix
+        else:
+            self.platform_key = "linux"
+            self._spawn = self._spawn_posix
+        
+        self._build_alias_index()
+        
         # Windows-specific: Import win32 for window focus
         self.win32_available = False
         if self.system == "Windows":
@@ -26,6 +72,27 @@ class AppLauncher:
             except ImportError:
                 pass
     
+    @staticmethod
+    def _read_json(path):
+        """Parse a JSON file"""
+        if ORJSON_AVAILABLE:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def _write_json(path, data):
+        """Write data as indented JSON - via a temp file, so a crash never leaves it half-written"""
+        tmp_path = path + ".tmp"
+        if ORJSON_AVAILABLE:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    
     def _load_config(self):
         """Load app configurations from file"""
         # Default apps
@@ -90,22 +157,45 @@ class AppLauncher:
         # Create config file if it doesn't exist
         if not os.path.exists(self.config_file):
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                json.dump(default_apps, f, indent=2)
+            self._write_json(self.config_file, default_apps)
             return default_apps
         
         # Load existing config
         try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+            return self._read_json(self.config_file)
         except:
             return default_apps
     
+    def _build_alias_index(self):
+        """Precompile alias lookup so matching is one regex scan per input"""
+        # Rendered app listings are rebuilt on next use
+        self._list_cache = None
+        self._help_cache = None
+        
+        self.alias_index = {}
+        for app_name, app_config in self.apps.items():
+            for alias in app_config.get('aliases', [app_name]):
+                self.alias_index.setdefault(alias.lower(), app_name)
+        
+        # Longest first so "google chrome" wins over "google"; aliases must be whole words
+        aliases = sorted(self.alias_index, key=len, reverse=True)
+        self.alias_pattern = None
+        if aliases:
+            self.alias_pattern = re.compile(
+                r"(?<!\S)(?:" + "|".join(map(re.escape, aliases)) + r")(?!\S)"
+            )
+    
+    def _match_alias(self, text):
+        """Return the app name for the first alias found in text, or None"""
+        if self.alias_pattern is None:
+            return None
+        match = self.alias_pattern.search(text)
+        return self.alias_index[match.group(0)] if match else None
+    
     def save_config(self):
         """Save current app configurations"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.apps, f, indent=2)
+            self._write_json(self.config_file, self.apps)
             return True
         except Exception as e:
             print(f"Failed to save config: {e}")
@@ -113,67 +203,53 @@ class AppLauncher:
     
     def add_app(self, name, app_type, command_or_url, aliases=None):
         """Add a new app to the configuration"""
-        if aliases is None:
-            aliases = [name.lower()]
-        
-        app_config = {
-            "type": app_type,
-            "aliases": aliases
-        }
-        
-        if app_type == "website":
-            app_config["url"] = command_or_url
-        else:
-            # For apps, store platform-specific commands
-            if self.system == "Windows":
-                app_config["windows"] = command_or_url
-            elif self.system == "Darwin":
-                app_config["mac"] = command_or_url
+        return self.add_apps([(name, app_type, command_or_url, aliases)])
+    
+    def add_apps(self, apps):
+        """Add several (name, type, command_or_url, aliases) apps - indexed and saved once"""
+        for name, app_type, command_or_url, aliases in apps:
+            if aliases is None:
+                aliases = [name.lower()]
+            
+            app_config = {
+                "type": app_type,
+                "aliases": aliases
+            }
+            
+            if app_type == "website":
+                app_config["url"] = command_or_url
             else:
-                app_config["linux"] = command_or_url
+                # For apps, store platform-specific commands
+                app_config[self.platform_key] = command_or_url
+            
+            self.apps[name.lower()] = app_config
         
-        self.apps[name.lower()] = app_config
+        self._build_alias_index()
         self.save_config()
         return True
     
-    def can_handle(self, user_input):
-        """Check if input is an app launch command"""
+    def match_command(self, user_input):
+        """Return the app to open if input is a launch command, else None - one scan for both checks"""
         user_lower = user_input.lower().strip()
         
         # Must contain an "open" type keyword
-        has_open_keyword = any(word in user_lower for word in ['open', 'launch', 'start', 'run'])
-        
-        if not has_open_keyword:
-            return False
+        if OPEN_KEYWORDS.isdisjoint(user_lower.split()):
+            return None
         
         # Must mention an app name or alias
-        for app_name, app_config in self.apps.items():
-            aliases = app_config.get('aliases', [app_name])
-            for alias in aliases:
-                # Check for whole word match
-                if f" {alias} " in f" {user_lower} " or user_lower.startswith(alias + " ") or user_lower.endswith(" " + alias) or user_lower == alias:
-                    return True
-        
-        return False
+        return self._match_alias(user_lower)
+    
+    def can_handle(self, user_input):
+        """Check if input is an app launch command"""
+        return self.match_command(user_input) is not None
     
     def extract_app_name(self, user_input):
         """Extract app name from user input"""
-        user_lower = user_input.lower().strip()
-        
-        # Remove common command words first
-        for word in ['please', 'can you', 'could you', 'would you', 'just', 'now']:
-            user_lower = user_lower.replace(word, '').strip()
+        # Remove common command words first (whole words, so "know" stays intact)
+        user_lower = FILLER_WORDS.sub('', user_input.lower()).strip()
         
-        # Find matching app by checking each alias
-        for app_name, app_config in self.apps.items():
-            aliases = app_config.get('aliases', [app_name])
-            for alias in aliases:
-                # Check if alias appears in the input
-                # Use word boundaries to avoid partial matches
-                if f" {alias} " in f" {user_lower} " or user_lower.startswith(alias + " ") or user_lower.endswith(" " + alias) or user_lower == alias:
-                    return app_name
-        
-        return None
+        # Find matching app by alias (whole words only)
+        return self._match_alias(user_lower)
     
     def _bring_window_to_front(self, process_name=None, window_title=None, wait_time=1.5):
         """Bring a window to the front (Windows only)"""
@@ -226,8 +302,63 @@ class AppLauncher:
         
         return False
     
-    def open_app(self, app_name):
-        """Open the specified application and bring it to front"""
+    def _spawn_windows(self, command):
+        """Start a command without waiting for it, output discarded"""
+        # Use CREATE_NO_WINDOW flag to hide console flash
+        CREATE_NO_WINDOW = 0x08000000
+        
+        # "start X" only needs cmd.exe to find X - run X directly when it's on PATH
+        target = command[6:].strip() if command.lower().startswith("start ") else command
+        executable = None
+        if not SHELL_METACHARACTERS.search(target):
+            executable = shutil.which(target)
+        
+        subprocess.Popen(
+            [executable] if executable else command, 
+            shell=executable is None,
+            creationflags=CREATE_NO_WINDOW,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    
+    def _spawn_posix(self, command):
+        """Start a command without waiting for it, output discarded"""
+        # posix_spawn skips the shell and doesn't copy our (large) address space the way fork does
+        argv = split_command(command)
+        if argv and hasattr(os, 'posix_spawnp'):
+            # Own session, so Ctrl+C in the assistant's terminal doesn't reach the app
+            pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=[
+                (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+                (os.POSIX_SPAWN_DUP2, 1, 2),
+            ], setsid=True)
+            # Reap the child when it exits so it doesn't linger as a zombie
+            threading.Thread(target=os.waitpid, args=(pid, 0), daemon=True).start()
+            return
+        
+        subprocess.Popen(
+            list(argv) if argv else command, 
+            shell=argv is None, 
+            stdout=subprocess.DEVNULL, 
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    
+    def exec_app(self, command):
+        """Replace this process with the command (POSIX) - never returns on success"""
+        sys.stdout.flush()
+        sys.stderr.flush()
+        
+        argv = split_command(command)
+        if argv is None:
+            os.execvp("/bin/sh", ["/bin/sh", "-c", command])
+        os.execvp(argv[0], argv)
+    
+    def open_app(self, app_name, replace_self=False):
+        """Open the specified application and bring it to front
+        
+        replace_self: on Linux/macOS, exec into the app instead of spawning it -
+        for when launching is the last thing this process does
+        """
         app_name = app_name.lower()
         
         if app_name not in self.apps:
@@ -257,36 +388,16 @@ class AppLauncher:
             
             else:
                 # Open application
-                command = None
-                
-                if self.system == "Windows":
-                    command = app_config.get('windows')
-                elif self.system == "Darwin":
-                    command = app_config.get('mac')
-                else:
-                    command = app_config.get('linux')
+                command = app_config.get(self.platform_key)
                 
                 if not command:
                     return False, f"No command configured for {app_name} on {self.system}"
                 
+                if replace_self and self.system != "Windows":
+                    self.exec_app(command)
+                
                 # Execute command with no window
-                if self.system == "Windows":
-                    # Use CREATE_NO_WINDOW flag to hide console flash
-                    CREATE_NO_WINDOW = 0x08000000
-                    subprocess.Popen(
-                        command, 
-                        shell=True,
-                        creationflags=CREATE_NO_WINDOW,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                else:
-                    subprocess.Popen(
-                        command, 
-                        shell=True, 
-                        stdout=subprocess.DEVNULL, 
-                        stderr=subprocess.DEVNULL
-                    )
+                self._spawn(command)
                 
                 # Try to bring window to front after launch
                 process_name = app_config.get('process_name')
@@ -312,16 +423,21 @@ class AppLauncher:
     
     def list_apps(self):
         """List all available apps"""
-        apps_list = []
-        for app_name, app_config in self.apps.items():
-            app_type = app_config.get('type', 'app')
-            aliases = app_config.get('aliases', [app_name])
-            apps_list.append(f"{app_name.capitalize()} ({app_type}) - aliases: {', '.join(aliases)}")
+        if self._list_cache is None:
+            apps_list = []
+            for app_name, app_config in self.apps.items():
+                app_type = app_config.get('type', 'app')
+                aliases = app_config.get('aliases', [app_name])
+                apps_list.append(f"{app_name.capitalize()} ({app_type}) - aliases: {', '.join(aliases)}")
+            self._list_cache = apps_list
         
-        return apps_list
+        return list(self._list_cache)
     
     def get_help_text(self):
         """Get help text for app launcher"""
+        if self._help_cache is not None:
+            return self._help_cache
+        
         help_lines = [
             "\nApp Launcher Commands:",
             "  open [app]     - Open an application or website",
@@ -333,4 +449,5 @@ class AppLauncher:
             aliases = app_config.get('aliases', [app_name])
             help_lines.append(f"  - {app_name} (say: {', '.join(aliases[:2])})")
         
-        return "\n".join(help_lines)
\ No newline at end of file
+        self._help_cache = "\n".join(help_lines)
+        return self._help_cache
\ No newline at end of file
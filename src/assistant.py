@@ -1,10 +1,20 @@
 from datetime import datetime as dt_module
+import functools
+import os
 import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from .llm import LLMHandler
+from .response_cache import SemanticIndex, NUMPY_AVAILABLE, query_signature
 from .search import WebSearch
 from .modular_memory import ModularMemorySystem
 from .app_launcher import AppLauncher
 from .calendar_handler import CalendarHandler
+from .keyword_matcher import KeywordClassifier
+from . import config
 
 try:
     from .reflection_engine import ReflectionEngine, MultiAgentDebate
@@ -21,12 +31,93 @@ except ImportError:
     PERSONALITY_AVAILABLE = False
     PersonalityEngine = None
 
-try:
-    from .news_aggregator import NewsAggregator
-    NEWS_AVAILABLE = True
-except ImportError:
-    NEWS_AVAILABLE = False
-    NewsAggregator = None
+# User is declining help/dismissing
+DECLINE_WORDS = ['no', 'nope', 'nah', 'im good', "i'm good", 'im fine', "i'm fine", 
+                 'im okay', "i'm okay", 'thats all', "that's all", 'nothing else']
+
+# More specific news triggers
+NEWS_KEYWORDS = [
+    'news', 'daily recap', 'daily summary', 'daily briefing',
+    'headlines', 'top stories', "what's happening today",
+    'current events', 'news summary', 'give me the news',
+    'tell me the news', 'today\'s news'
+]
+
+# Simple date/time questions (answered locally, never searched)
+DATE_TIME_PATTERN = re.compile(
+    r'\b(what|whats|what\'s)\s+(is\s+)?(the\s+)?(date|time|day)\b'
+    r'|\b(current|today\'?s?)\s+(date|time|day)\b'
+    r'|\bwhat\s+day\s+is\s+it\b'
+)
+
+# Prompt templates - filled with str.format on each request
+DEFAULT_PERSONALITY_PROMPT = "You are JARVIS, an advanced AI assistant."
+
+CONTEXT_PROMPT_TEMPLATE = """{personality_prompt}
+
+{context}
+
+IMPORTANT: The information above is what you know about the user. Use it to personalize your response when relevant.
+
+---
+
+User's current message: {user_input}
+
+Respond naturally and personally, referencing what you know about them when relevant."""
+
+SEARCH_PROMPT_TEMPLATE = """{personality_prompt}
+
+TODAY'S DATE: {current_date}
+
+USER QUESTION: {user_input}
+
+CURRENT WEB SEARCH RESULTS:
+{search_results}
+
+Instructions: Answer the user's question using the search results above. Be conversational and natural."""
+
+NEWS_DEEPDIVE_PROMPT_TEMPLATE = """{personality_prompt}
+
+The user asked for more details about: "{headline}"
+
+Here are related articles:
+
+{articles_text}
+
+Provide a comprehensive summary (2-3 paragraphs) covering:
+1. What happened
+2. Why it matters
+3. Key implications or context
+
+Be conversational and informative."""
+
+NEWS_READY_PROMPT_TEMPLATE = """{personality_prompt}
+
+Today's news summary is ready with {total_stories} stories across technology, business, general news, and science.
+
+Respond briefly (1 sentence) saying the news is ready and they can ask for more details on any story using 'more [number]' or 'more [topic]'.
+
+Keep it conversational and brief."""
+
+NEWS_BRIEFING_PROMPT_TEMPLATE = """{personality_prompt}
+
+Here are today's top headlines:
+
+{news_text}
+
+Create a comprehensive daily briefing organized by category. For each category that has news, keep responses under 5 sentences total and be clear and informative."""
+
+# Search results mentioning any of these are treated as a failed search
+SEARCH_FAILURE_PATTERN = re.compile(r'error|unavailable|failed', re.IGNORECASE)
+
+# One scan of the input tags every keyword group it mentions
+# (decline words are short - "no" must not fire on "know"; search and news
+# match inside words like WebSearch.needs_search, so "stocks" still searches)
+INTENT_CLASSIFIER = KeywordClassifier({
+    'decline': DECLINE_WORDS,
+    'news': NEWS_KEYWORDS,
+    'search': config.SEARCH_KEYWORDS,
+}, whole_word_groups=['decline'])
 
 
 class JarvisAssistant:
@@ -37,7 +128,7 @@ class JarvisAssistant:
         
         # Initialize web search
         try:
-            self.search = WebSearch()
+            self.search = WebSearch(embed_fn=self.llm.embed_batch)
         except Exception:
             self.search = None
         
@@ -62,11 +153,14 @@ class JarvisAssistant:
         else:
             self.personality = None
         
-        # Initialize news aggregator (if available)
-        if NEWS_AVAILABLE:
-            self.news = NewsAggregator()
-        else:
-            self.news = None
+        # News aggregator is created on first use (BeautifulSoup is slow to import)
+        self._news = None
+        self._news_available = True
+        self._news_lock = threading.Lock()
+        
+        # Fetch headlines while the user is still typing, so the first news request is instant
+        if config.NEWS_PREFETCH:
+            threading.Thread(target=self._prefetch_news, daemon=True).start()
         
         # Initialize reflection engine (if available)
         if REFLECTION_AVAILABLE:
@@ -77,12 +171,29 @@ class JarvisAssistant:
             self.reflection = None
             self.debate = None
         
-        # Search cache (simple dict for now)
-        self.search_cache = {}
+        # Search answers, least recently used first: query -> (time.monotonic(), response)
+        self.search_cache = OrderedDict()
+        
+        # Paraphrases of a cached query ("paris weather today" / "what's the weather in paris") find its key here -
+        # only when they name the same things, so "weather in LA" and "weather in los angeles" stay separate
+        self._search_index = None
+        if config.SEARCH_SEMANTIC_CACHE and NUMPY_AVAILABLE:
+            self._search_index = SemanticIndex(50, config.SEARCH_SEMANTIC_THRESHOLD)
+        self._query_vector = (None, None)
+        self._query_vector_lock = threading.Lock()
         
-        # Conversation memory
-        self.conversation_history = []
+        # Answers are also written to disk, so a restart within the hour still hits
+        self._search_db = self._open_search_db() if config.SEARCH_ANSWER_PERSIST else None
+        
+        # Runs network work (web search) while the rest of the turn is prepared
+        self.background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis")
+        
+        # Learns from finished turns off the response path; one worker keeps turns in order
+        self._learn_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-learn")
+        
+        # Conversation memory - the deque drops the oldest messages past max_history exchanges
         self.max_history = 10
+        self.conversation_history = deque(maxlen=self.max_history * 2)
         
         # Learning settings
         self.auto_learn = True
@@ -93,32 +204,34 @@ class JarvisAssistant:
         # Track last assistant action to avoid repeated offers
         self.last_action_needed_followup = False
     
-    def chat(self, user_input):
-        """Process user input and return response"""
+    def chat(self, user_input, on_token=None):
+        """Process user input and return response
+        
+        on_token: optional callback that receives model output as it streams;
+        the full response is still returned
+        """
         try:
             self.message_count += 1
             
+            user_lower = user_input.lower().strip()
+            intents = INTENT_CLASSIFIER.classify(user_lower)
+            
             # Check if user is declining help/dismissing
-            decline_words = ['no', 'nope', 'nah', 'im good', "i'm good", 'im fine', "i'm fine", 
-                            'im okay', "i'm okay", 'thats all', "that's all", 'nothing else']
-            if any(word in user_input.lower().strip() for word in decline_words):
+            if 'decline' in intents:
                 if self.last_action_needed_followup:
                     # User is saying no to our offer of help
                     self.last_action_needed_followup = False
                     return "Understood, sir."
             
             # Check for app launch commands FIRST
-            if self.app_launcher.can_handle(user_input):
-                app_name = self.app_launcher.extract_app_name(user_input)
-                if app_name:
-                    success, message = self.app_launcher.open_app(app_name)
-                    self.last_action_needed_followup = False  # Don't follow up after opening app
-                    if success:
-                        return f"Opening {app_name}, sir."
-                    else:
-                        return f"I couldn't open {app_name}, sir. {message}"
+            app_name = self.app_launcher.match_command(user_input)
+            if app_name:
+                success, message = self.app_launcher.open_app(app_name)
+                self.last_action_needed_followup = False  # Don't follow up after opening app
+                if success:
+                    return f"Opening {app_name}, sir."
                 else:
-                    return "I'm not sure which app you want me to open, sir."
+                    return f"I couldn't open {app_name}, sir. {message}"
             
             # Check for calendar commands
             if self.calendar.can_handle(user_input):
@@ -127,37 +240,30 @@ class JarvisAssistant:
                 return message
             
             # Check for simple date/time questions (don't search for these)
-            date_time_patterns = [
-                r'\b(what|whats|what\'s)\s+(is\s+)?(the\s+)?(date|time|day)\b',
-                r'\b(current|today\'?s?)\s+(date|time|day)\b',
-                r'\bwhat\s+day\s+is\s+it\b',
-            ]
-            
-            if any(re.search(pattern, user_input.lower()) for pattern in date_time_patterns):
-                current_date = dt_module.now().strftime("%B %d, %Y")
-                current_time = dt_module.now().strftime("%I:%M %p")
-                current_day = dt_module.now().strftime("%A")
+            if DATE_TIME_PATTERN.search(user_lower):
+                # One clock read, formatted only for the part they asked about
+                now = dt_module.now()
                 
                 # Determine what they're asking for
-                if 'time' in user_input.lower():
-                    return f"It's {current_time}, sir."
-                elif 'day' in user_input.lower():
-                    return f"Today is {current_day}, {current_date}, sir."
+                if 'time' in user_lower:
+                    return f"It's {now:%I:%M %p}, sir."
+                elif 'day' in user_lower:
+                    return f"Today is {now:%A}, {now:%B %d, %Y}, sir."
                 else:
-                    return f"Today is {current_date}, sir."
+                    return f"Today is {now:%B %d, %Y}, sir."
             
             # Check for reflection/debate commands
             if self.reflection:
-                if user_input.lower().startswith('debate '):
-                    question = user_input[7:].strip()
+                if user_lower.startswith('debate '):
+                    question = user_input.strip()[7:].strip()
                     if question:
                         answer, debate_history = self.debate.debate(question, rounds=2)
                         return f"\n[Multi-Agent Debate Result]\n\n{answer}"
                     else:
                         return "Please provide a question to debate. Example: 'debate should I learn Python or JavaScript?'"
                 
-                if user_input.lower().startswith('think '):
-                    question = user_input[6:].strip()
+                if user_lower.startswith('think '):
+                    question = user_input.strip()[6:].strip()
                     if question:
                         answer = self.reflection.chain_of_thought(
                             question,
@@ -167,7 +273,7 @@ class JarvisAssistant:
                     else:
                         return "Please provide a question to think through. Example: 'think how does photosynthesis work?'"
                 
-                if user_input.lower() == 'reflection stats':
+                if user_lower == 'reflection stats':
                     stats = self.reflection.get_stats()
                     return f"""Reflection Statistics:
    Total reflections: {stats['total_reflections']}
@@ -175,22 +281,13 @@ class JarvisAssistant:
    Improvement rate: {stats['improvement_rate']:.1%}
    Status: {'Enabled' if stats['enabled'] else 'Disabled'}"""
                 
-                if user_input.lower() in ['reflection on', 'reflection off']:
-                    enabled = 'on' in user_input.lower()
+                if user_lower in ('reflection on', 'reflection off'):
+                    enabled = user_lower == 'reflection on'
                     self.reflection.toggle_reflection(enabled)
                     return f"Self-reflection {'enabled' if enabled else 'disabled'}, sir."
             
-            # More specific news triggers
-            news_keywords = [
-                'news', 'daily recap', 'daily summary', 'daily briefing',
-                'headlines', 'top stories', "what's happening today",
-                'current events', 'news summary', 'give me the news',
-                'tell me the news', 'today\'s news'
-            ]
-            
             # Check for exact news request
-            user_lower = user_input.lower().strip()
-            is_news_request = any(keyword in user_lower for keyword in news_keywords)
+            is_news_request = 'news' in intents
             
             # Check for "more" command (news deep-dive)
             if user_lower.startswith('more ') and self.news:
@@ -200,32 +297,61 @@ class JarvisAssistant:
             if is_news_request and self.news:
                 return self._handle_news_request(user_input, headlines_only=True)
             
+            # Start the web search (or the memory lookup) now so it overlaps with the local work below
+            use_search = self.search is not None and 'search' in intents
+            search_future = None
+            context_future = None
+            cached_result = None
+            if use_search:
+                cached_result = self._cached_search_answer(user_input, semantic=False)
+                if cached_result is None:
+                    # The reranker reuses this turn's query vector instead of embedding the query again
+                    search_key = user_input.lower().strip()
+                    search_future = self.background.submit(
+                        self.search.search, user_input, functools.partial(self._search_vector, search_key)
+                    )
+                    
+                    # The paraphrase lookup embeds the query - the search is already under way meanwhile
+                    cached_result = self._similar_search_answer(search_key)
+                    if cached_result is not None:
+                        search_future.cancel()
+                        search_future = None
+            else:
+                context_future = self.background.submit(self.memory.get_context_for_query, user_input)
+            
             # Evolve personality based on this interaction
             if self.personality:
                 self.personality.evolve_personality(user_input)
             
-            # Add user message to history
+            # Add user message to history - one epoch timestamp shared by both messages of the turn
+            turn_time = time.time()
             self.conversation_history.append({
                 'role': 'user',
                 'content': user_input,
-                'timestamp': dt_module.now().isoformat()
+                'timestamp': turn_time
             })
             
             # Generate response
-            if self.search and self.search.needs_search(user_input):
-                response = self._handle_search_query(user_input)
+            if use_search:
+                response = self._handle_search_query(user_input, on_token, search_future, cached_result)
             else:
-                response = self._handle_general_query(user_input)
+                response = self._handle_general_query(user_input, on_token, context_future)
             
             # SELF-REFLECTION: Check if response needs improvement
             if self.reflection and self.reflection.should_reflect(user_input, response):
                 if self.debug:
                     print("\n[Self-Reflection Triggered]")
                 
+                # Reuse the memory context the answer was built from
+                if context_future is not None:
+                    context = context_future.result()
+                else:
+                    context = self.memory.get_context_for_query(user_input)
+                
                 improved_response, was_improved, notes = self.reflection.reflect_and_improve(
                     user_input, 
                     response,
-                    context=self.memory.get_context_for_query(user_input)
+                    context=context
                 )
                 
                 if was_improved:
@@ -238,28 +364,12 @@ class JarvisAssistant:
             self.conversation_history.append({
                 'role': 'assistant',
                 'content': response,
-                'timestamp': dt_module.now().isoformat()
+                'timestamp': turn_time
             })
             
-            # Auto-learn from this conversation (with better filtering now)
+            # Auto-learn from this conversation (with better filtering now) - in the background
             if self.auto_learn and (self.message_count % self.learn_frequency == 0):
-                if self.debug:
-                    print(f"\n[DEBUG] Attempting to learn from: '{user_input[:50]}...'")
-                
-                learned_count = self.memory.learn_from_conversation(
-                    user_input, 
-                    response
-                )
-                
-                if self.debug:
-                    print(f"[DEBUG] Learned {learned_count} facts")
-                
-                if learned_count > 0:
-                    print("[*] ", end="", flush=True)
-            
-            # Trim history if too long
-            if len(self.conversation_history) > self.max_history * 2:
-                self.conversation_history = self.conversation_history[-self.max_history * 2:]
+                self._learn_pool.submit(self._background_learn, user_input, response)
             
             # Check if this response needs followup (avoid asking after simple actions)
             self.last_action_needed_followup = self._should_offer_followup(response)
@@ -272,31 +382,58 @@ class JarvisAssistant:
             traceback.print_exc()
             return "I'm having trouble processing that. Could you try rephrasing?"
     
+    def _background_learn(self, user_input, response):
+        """Extract facts from a finished turn (runs on the learning thread)"""
+        try:
+            if self.debug:
+                print(f"\n[DEBUG] Attempting to learn from: '{user_input[:50]}...'")
+            
+            learned_count = self.memory.learn_from_conversation(user_input, response)
+            
+            if self.debug:
+                print(f"[DEBUG] Learned {learned_count} facts")
+        except Exception as e:
+            print(f"\n[Learning Error]: {e}")
+    
     def _should_offer_followup(self, response):
         """Determine if response warrants offering more help"""
-        # Don't offer followup for:
-        # - Confirmations (already done something)
-        # - Simple answers
-        # - Commands executed
-        
-        lower_response = response.lower()
-        
-        # If it's a confirmation, no followup needed
-        confirmation_words = ['opening', 'created', 'set', 'done', 'understood', 'noted', 'got it']
-        if any(word in lower_response for word in confirmation_words):
-            return False
-        
-        # If it's a very short response (< 20 words), probably don't need followup
-        if len(response.split()) < 20:
-            return False
-        
-        return False  # Default: don't offer followup
+        # Followups are never offered - confirmations, short answers and everything
+        # else all come out False, so there is nothing to scan the response for
+        return False
+    
+    @property
+    def news(self):
+        """News aggregator, or None if its dependencies are missing"""
+        if self._news is None and self._news_available:
+            with self._news_lock:
+                if self._news is None and self._news_available:
+                    try:
+                        from .news_aggregator import NewsAggregator
+                        self._news = NewsAggregator()
+                    except ImportError:
+                        self._news_available = False
+        return self._news
+    
+    def _prefetch_news(self):
+        """Warm the headline cache in the background"""
+        news = self.news
+        if news:
+            news.refresh()
     
-    def _handle_general_query(self, user_input):
+    def _personality_prompt(self):
+        """Personality-adjusted system prompt, or the default one"""
+        if self.personality:
+            return self.personality.get_system_prompt_modifier()
+        return DEFAULT_PERSONALITY_PROMPT
+    
+    def _handle_general_query(self, user_input, on_token=None, context_future=None):
         """Handle queries without web search"""
         
-        # Get relevant context from memory
-        context = self.memory.get_context_for_query(user_input)
+        # Get relevant context from memory (or collect the lookup started in chat)
+        if context_future is not None:
+            context = context_future.result()
+        else:
+            context = self.memory.get_context_for_query(user_input)
         
         # Get personality-adjusted system prompt with STRONGER effects
         if self.personality:
@@ -308,72 +445,160 @@ class JarvisAssistant:
         
         # Build enhanced prompt
         if context:
-            enhanced_input = f"""{personality_prompt}
-
-{context}
-
-IMPORTANT: The information above is what you know about the user. Use it to personalize your response when relevant.
-
----
-
-User's current message: {user_input}
-
-Respond naturally and personally, referencing what you know about them when relevant."""
+            enhanced_input = CONTEXT_PROMPT_TEMPLATE.format(
+                personality_prompt=personality_prompt,
+                context=context,
+                user_input=user_input
+            )
         else:
             enhanced_input = f"{personality_prompt}\n\nUser: {user_input}"
         
-        return self.llm.generate_with_history(enhanced_input, self.conversation_history)
+        return self.llm.generate_with_history(enhanced_input, self.conversation_history, on_token, semantic_text=user_input)
     
-    def _handle_search_query(self, user_input):
-        """Handle queries requiring web search"""
+    def _search_vector(self, cache_key):
+        """Embedding of a normalized search query - the last one is remembered for the rest of the turn"""
+        # The search thread's reranker asks for it too - whoever comes second waits for the first
+        with self._query_vector_lock:
+            if self._search_index is None:
+                return None
+            
+            if self._query_vector[0] != cache_key:
+                try:
+                    vector = SemanticIndex.normalize(self.llm.embed(cache_key))
+                except Exception:
+                    # Embedding model missing or unreachable - exact matches only this session
+                    self._search_index = None
+                    return None
+                self._query_vector = (cache_key, vector)
+            
+            return self._query_vector[1]
+    
+    def _open_search_db(self):
+        """Open the on-disk search answer store, dropping expired rows (None if unavailable)"""
+        try:
+            db = sqlite3.connect(os.path.join("./jarvis_data", "search_cache.db"), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, ts REAL, response TEXT)")
+            db.execute("DELETE FROM search_cache WHERE ts < ?", (time.time() - 3600,))
+            db.commit()
+            return db
+        except sqlite3.Error:
+            return None
+    
+    def _remember_search(self, cache_key, entry):
+        """Put an answer in the in-memory LRU, evicting the least recently used past 50 entries"""
+        self.search_cache[cache_key] = entry
+        self.search_cache.move_to_end(cache_key)
+        while len(self.search_cache) > 50:
+            self.search_cache.popitem(last=False)
+    
+    def _load_search_answer(self, cache_key):
+        """Look up an answer saved by an earlier session"""
+        if self._search_db is None:
+            return None
         
-        # Check cache first
+        try:
+            row = self._search_db.execute(
+                "SELECT ts, response FROM search_cache WHERE key = ?", (cache_key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        
+        # Stored as wall-clock time - convert to this process's monotonic clock
+        saved_at, response = row
+        entry = (time.monotonic() - (time.time() - saved_at), response)
+        self._remember_search(cache_key, entry)
+        return entry
+    
+    def _cached_search_answer(self, user_input, semantic=True):
+        """Return a still-fresh cached answer for this search query (or, if semantic, a paraphrase of it), or None"""
         cache_key = user_input.lower().strip()
-        if cache_key in self.search_cache:
-            cached_time, cached_result = self.search_cache[cache_key]
-            # Cache valid for 1 hour
-            if (dt_module.now() - cached_time).seconds < 3600:
-                print("(cached) ", end="", flush=True)
-                return cached_result
+        entry = self.search_cache.get(cache_key) or self._load_search_answer(cache_key)
+        if entry is None:
+            return self._similar_search_answer(cache_key) if semantic else None
         
-        # Perform search
-        search_results = self.search.search(user_input)
-        
-        # Handle failures
-        if any(word in search_results.lower() for word in ['error', 'unavailable', 'failed']):
-            return self.llm.generate_with_history(user_input, self.conversation_history)
+        return self._fresh_search_answer(cache_key, entry)
+    
+    def _similar_search_answer(self, cache_key):
+        """Return a still-fresh cached answer to a paraphrase of this normalized query, or None"""
+        # Nothing cached to compare against - skip the embedding round trip
+        if not self._search_index:
+            return None
+        
+        vector = self._search_vector(cache_key)
+        if vector is None:
+            return None
+        
+        # A paraphrase must name the same things - "weather in paris" is not "weather in london"
+        similar_key, _ = self._search_index.lookup(vector, tag=query_signature(cache_key))
+        entry = self.search_cache.get(similar_key)
+        if entry is None:
+            return None
+        
+        return self._fresh_search_answer(similar_key, entry)
+    
+    def _fresh_search_answer(self, cache_key, entry):
+        """Return the cached response if it is still fresh, dropping it otherwise"""
+        # Cache valid for 1 hour
+        cached_time, cached_result = entry
+        if time.monotonic() - cached_time >= 3600:
+            del self.search_cache[cache_key]
+            return None
+        
+        self.search_cache.move_to_end(cache_key)
+        return cached_result
+    
+    def _handle_search_query(self, user_input, on_token=None, search_future=None, cached_result=None):
+        """Handle queries requiring web search"""
         
-        # Get personality prompt for search responses too
-        if self.personality:
-            personality_prompt = self.personality.get_system_prompt_modifier()
+        # Check cache first (chat already did, unless called directly)
+        cache_key = user_input.lower().strip()
+        if cached_result is None and search_future is None:
+            cached_result = self._cached_search_answer(user_input)
+        if cached_result is not None:
+            print("(cached) ", end="", flush=True)
+            if on_token:
+                on_token(cached_result)
+            return cached_result
+        
+        # Perform search (or collect the one started in chat)
+        if search_future is not None:
+            search_results = search_future.result()
         else:
-            personality_prompt = "You are JARVIS, an advanced AI assistant."
+            search_results = self.search.search(user_input, functools.partial(self._search_vector, cache_key))
+        
+        # Handle failures
+        if SEARCH_FAILURE_PATTERN.search(search_results):
+            return self.llm.generate_with_history(user_input, self.conversation_history, on_token)
         
         # Build search-enhanced prompt with dynamic date
-        current_date = dt_module.now().strftime("%B %d, %Y")
-        prompt = f"""{personality_prompt}
-
-TODAY'S DATE: {current_date}
-
-USER QUESTION: {user_input}
-
-CURRENT WEB SEARCH RESULTS:
-{search_results}
-
-Instructions: Answer the user's question using the search results above. Be conversational and natural."""
+        prompt = SEARCH_PROMPT_TEMPLATE.format(
+            personality_prompt=self._personality_prompt(),
+            current_date=dt_module.now().strftime("%B %d, %Y"),
+            user_input=user_input,
+            search_results=search_results
+        )
         
-        response = self.llm.generate(prompt, use_search_context=True)
+        response = self.llm.generate(prompt, use_search_context=True, on_token=on_token)
         
         # Cache the result
-        self.search_cache[cache_key] = (dt_module.now(), response)
+        self._remember_search(cache_key, (time.monotonic(), response))
+        if self._search_db is not None:
+            try:
+                self._search_db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, ts, response) VALUES (?, ?, ?)",
+                    (cache_key, time.time(), response)
+                )
+                self._search_db.commit()
+            except sqlite3.Error:
+                pass
         
-        # Limit cache size
-        if len(self.search_cache) > 50:
-            sorted_cache = sorted(
-                self.search_cache.items(),
-                key=lambda x: x[1][0]
-            )
-            self.search_cache = dict(sorted_cache[-25:])
+        vector = self._search_vector(cache_key)
+        if vector is not None:
+            self._search_index.add(vector, cache_key, tag=query_signature(cache_key))
         
         return response
     
@@ -391,32 +616,18 @@ Instructions: Answer the user's question using the search results above. Be conv
         
         formatted = self.news.format_topic_details(details)
         
-        if self.personality:
-            personality_prompt = self.personality.get_system_prompt_modifier()
-        else:
-            personality_prompt = "You are JARVIS, an advanced AI assistant."
-        
-        articles_text = "\n\n".join([
-            f"Article {i+1} ({art['source']}):\n{art['title']}\n{art['description']}"
-            for i, art in enumerate(details['articles'])
-        ])
+        articles_text = "\n\n".join(
+            f"Article {i} ({art['source']}):\n{art['title']}\n{art['description']}"
+            for i, art in enumerate(details['articles'], 1)
+        )
         
-        prompt = f"""{personality_prompt}
-
-The user asked for more details about: "{details['headline']}"
-
-Here are related articles:
-
-{articles_text}
-
-Provide a comprehensive summary (2-3 paragraphs) covering:
-1. What happened
-2. Why it matters
-3. Key implications or context
-
-Be conversational and informative."""
+        prompt = NEWS_DEEPDIVE_PROMPT_TEMPLATE.format(
+            personality_prompt=self._personality_prompt(),
+            headline=details['headline'],
+            articles_text=articles_text
+        )
         
-        llm_summary = self.llm.generate(prompt, use_search_context=False)
+        llm_summary = self.llm.generate(prompt, use_search_context=False, semantic_text=user_input)
         
         return f"\n{formatted}\n\nSUMMARY:\n{llm_summary}"
     
@@ -430,22 +641,15 @@ Be conversational and informative."""
             formatted = self.news.format_summary(summary, show_numbers=True)
             print(formatted)
             
-            total_stories = sum(len(summary.get(cat, [])) for cat in ['general', 'tech', 'business', 'science'])
+            # get_daily_summary already numbered every story for 'more [number]'
+            total_stories = len(self.news.indexed_topics)
             
-            if self.personality:
-                personality_prompt = self.personality.get_system_prompt_modifier()
-            else:
-                personality_prompt = "You are JARVIS, an advanced AI assistant."
-            
-            prompt = f"""{personality_prompt}
-
-Today's news summary is ready with {total_stories} stories across technology, business, general news, and science.
-
-Respond briefly (1 sentence) saying the news is ready and they can ask for more details on any story using 'more [number]' or 'more [topic]'.
-
-Keep it conversational and brief."""
+            prompt = NEWS_READY_PROMPT_TEMPLATE.format(
+                personality_prompt=self._personality_prompt(),
+                total_stories=total_stories
+            )
             
-            spoken_response = self.llm.generate(prompt, use_search_context=False)
+            spoken_response = self.llm.generate(prompt, use_search_context=False, semantic_text=user_input)
             
             return spoken_response
         
@@ -453,22 +657,12 @@ Keep it conversational and brief."""
             formatted = self.news.format_summary(summary, show_numbers=True)
             print(formatted)
             
-            news_text = self.news.get_summary_for_llm(summary)
-            
-            if self.personality:
-                personality_prompt = self.personality.get_system_prompt_modifier()
-            else:
-                personality_prompt = "You are JARVIS, an advanced AI assistant."
-            
-            prompt = f"""{personality_prompt}
-
-Here are today's top headlines:
-
-{news_text}
-
-Create a comprehensive daily briefing organized by category. For each category that has news, keep responses under 5 sentences total and be clear and informative."""
+            prompt = NEWS_BRIEFING_PROMPT_TEMPLATE.format(
+                personality_prompt=self._personality_prompt(),
+                news_text=self.news.get_summary_for_llm(summary)
+            )
             
-            llm_summary = self.llm.generate(prompt, use_search_context=False)
+            llm_summary = self.llm.generate(prompt, use_search_context=False, semantic_text=user_input)
             
             return f"\n{llm_summary}"
     
@@ -483,12 +677,12 @@ Create a comprehensive daily briefing organized by category. For each category t
         print(f"Auto-learning {status}")
         return self.auto_learn
     
-    def export_for_finetuning(self, filepath=None):
+    def export_for_finetuning(self, filepath=None, stats=None):
         """Export training data for future fine-tuning"""
         if filepath is None:
             filepath = f"./jarvis_data/training_export_{dt_module.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        return self.memory.export_training_data(filepath)
+        return self.memory.export_training_data(filepath, stats)
     
     def get_memory_stats(self):
         """Get detailed memory statistics"""
@@ -498,25 +692,38 @@ Create a comprehensive daily briefing organized by category. For each category t
         """Save everything before exiting"""
         print("\nSaving memories...")
         
+        # Let learning from the last turns finish so the export includes it
+        self._learn_pool.shutdown(wait=True)
+        
+        # Stats are computed once - they go into the export header and the summary below
+        stats = self.get_memory_stats()
+        
         try:
-            export_path = self.export_for_finetuning()
+            # Exit-time exports pile up, so they are written as gzipped JSON lines
+            filepath = f"./jarvis_data/training_export_{dt_module.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+            export_path = self.export_for_finetuning(filepath, stats)
             print(f"Training data exported: {export_path}")
         except Exception as e:
             print(f"Export failed: {e}")
         
-        stats = self.get_memory_stats()
-        print(f"\nSession Summary:")
-        print(f"   Total facts remembered: {stats['total_facts']}")
-        print(f"   Learned this session: {stats['learned_this_session']}")
+        lines = [
+            "\nSession Summary:",
+            f"   Total facts remembered: {stats['total_facts']}",
+            f"   Learned this session: {stats['learned_this_session']}",
+        ]
         
         if stats['by_category']:
-            print(f"\nBy Category:")
-            for cat, count in stats['by_category'].items():
-                print(f"   {cat}: {count}")
+            lines.append("\nBy Category:")
+            lines.extend(f"   {cat}: {count}" for cat, count in stats['by_category'].items())
         
         if stats['by_learning_engine']:
-            print(f"\nBy Learning Method:")
-            for engine, count in stats['by_learning_engine'].items():
-                print(f"   {engine}: {count}")
+            lines.append("\nBy Learning Method:")
+            lines.extend(f"   {engine}: {count}" for engine, count in stats['by_learning_engine'].items())
+        
+        print("\n".join(lines))
+        
+        self.background.shutdown(wait=False)
+        if self._search_db is not None:
+            self._search_db.close()
         
         print("\nGoodbye!")
\ No newline at end of file
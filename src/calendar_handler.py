@@ -2,6 +2,13 @@ import webbrowser
 import urllib.parse
 import re
 from datetime import datetime, timedelta
+from .keyword_matcher import KeywordMatcher
+
+CALENDAR_KEYWORDS = KeywordMatcher([
+    'schedule', 'create event', 'add event', 'calendar',
+    'remind me', 'set reminder', 'add reminder',
+    'meeting', 'appointment'
+])
 
 
 class CalendarHandler:
@@ -24,13 +31,7 @@ class CalendarHandler:
             return True
         
         user_lower = user_input.lower().strip()
-        calendar_keywords = [
-            'schedule', 'create event', 'add event', 'calendar',
-            'remind me', 'set reminder', 'add reminder',
-            'meeting', 'appointment'
-        ]
-        
-        return any(keyword in user_lower for keyword in calendar_keywords)
+        return CALENDAR_KEYWORDS.search(user_lower) is not None
     
     def handle_command(self, user_input):
         """Main handler for calendar commands"""
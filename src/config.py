@@ -5,17 +5,45 @@ GPT_OSS_MAX_TOKENS = 512
 GPT_OSS_PRIORITY = False
 
 # Ollama Models
+OLLAMA_HOST = "http://localhost:11434"
 DEFAULT_MODEL = "qwen2.5:14b"
 SECONDARY_MODEL = None
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model loaded between requests
+OLLAMA_WARMUP = True  # Verify and preload the model in the background at startup
 
 # A/B Testing - Now enabled by default
 ENABLE_AB_TESTING = True
 CONFIDENCE_THRESHOLD = 30  # Minimum confidence difference to prefer one model
 
+# Response cache - exact prompt hash plus embedding similarity, for chat, news and one-shot prompts
+ENABLE_RESPONSE_CACHE = True
+RESPONSE_CACHE_SIZE = 256
+EMBEDDING_MODEL = "nomic-embed-text"
+SEMANTIC_CACHE_THRESHOLD = 0.92  # Minimum cosine similarity for a semantic hit (names and numbers must match too)
+
 # Search Configuration
 SEARCH_TIMEOUT = 30
 SEARCH_MAX_RESULTS = 5
-SEARCH_DELAY = 1
+SEARCH_RATE_LIMIT = 0.4  # Sustained searches per second before throttling kicks in
+SEARCH_BURST = 3  # Searches allowed back-to-back before throttling
+SEARCH_PARALLEL = True  # Query all engines at once and use whichever answers usefully first
+SEARCH_SESSION_REFRESH = 600  # Seconds before the pooled HTTP session is rebuilt
+SEARCH_CACHE_SIZE = 256  # Max cached search results
+SEARCH_CACHE_TTL = 3600  # Seconds a search result stays fresh
+SEARCH_CACHE_TTL_WEATHER = 900  # Weather changes faster
+SEARCH_CACHE_TTL_NEWS = 300  # News changes fastest
+SEARCH_SNIPPET_CHARS = 240  # Max characters kept from each result snippet
+SEARCH_CONTEXT_TOKENS = 1024  # Approximate token budget for search results in the prompt
+SEARCH_RERANK = True  # Rank results by embedding similarity to the query
+SEARCH_RERANK_WEIGHT = 0.7  # Share of the score from similarity (rest from credibility)
+SEARCH_EMBEDDING_CACHE_SIZE = 512  # Max cached result embeddings
+SEARCH_SEMANTIC_CACHE = True  # Reuse a cached search answer for a paraphrased question
+SEARCH_ANSWER_PERSIST = True  # Keep search answers in jarvis_data/search_cache.db so they survive a restart
+SEARCH_SEMANTIC_THRESHOLD = 0.95  # Minimum query similarity - stricter than responses since a wrong city or ticker is worse than a miss
+
+# News - headlines are fetched in the background at startup and reused until stale
+NEWS_PREFETCH = True
+NEWS_CACHE_TTL = 900  # Seconds before cached headlines are refreshed in the background
 
 # Credible source domains
 CREDIBLE_DOMAINS = [
@@ -53,4 +81,29 @@ MODEL_OPTIONS = {
     'temperature': 0.7,  # 0=deterministic, 1=creative
     'top_p': 0.9,
     'top_k': 40,
-}
\ No newline at end of file
+}
+
+# Overrides for non-creative prompts, chat turns included - greedy decoding gives identical, cacheable output
+DETERMINISTIC_OPTIONS = {
+    'temperature': 0,
+    'seed': 0,
+    'top_p': 1,
+    'top_k': 1,
+}
+
+# Prompts containing these keep sampled output and skip the response cache
+CREATIVE_KEYWORDS = [
+    'story', 'poem', 'joke', 'creative', 'imagine', 'brainstorm',
+    'song', 'lyrics', 'riddle', 'invent'
+]
+
+# Print tokens as they are generated in text mode
+STREAM_RESPONSES = True
+
+# Speech recognition - "google" (online) or "whisper" (local, needs faster-whisper)
+ASR_BACKEND = "google"
+WHISPER_MODEL = "base.en"
+WHISPER_COMPUTE_TYPE = "int8"  # Quantized weights - fastest on CPU
+
+# Wake word - set a Picovoice access key to spot "jarvis" with Porcupine instead of polling ASR
+PORCUPINE_ACCESS_KEY = ""
\ No newline at end of file
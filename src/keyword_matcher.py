@@ -0,0 +1,156 @@
+import re
+
+# Aho-Corasick automaton is optional - fall back to a compiled regex
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _is_word_char(char):
+    """Same notion of a word character as the regex \\w class"""
+    return char.isalnum() or char == '_'
+
+
+def _whole_word_in(keyword, text):
+    """True if keyword appears in text as a whole word"""
+    return re.search(r"(?<!\w)" + re.escape(keyword) + r"(?!\w)", text) is not None
+
+
+class KeywordMatcher:
+    """Match many keywords against a string in a single pass"""
+
+    def __init__(self, keywords):
+        # Keywords are lowercased like KeywordClassifier's - callers match lowercased text
+        self.keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords))
+        self._automaton = None
+        self._pattern = None
+
+        if not self.keywords:
+            return
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            # Longest first so the alternation prefers the most specific keyword
+            ordered = sorted(self.keywords, key=len, reverse=True)
+            self._pattern = re.compile("|".join(map(re.escape, ordered)))
+
+    def search(self, text):
+        """Return the first keyword found in text, or None"""
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(text):
+                return keyword
+            return None
+
+        if self._pattern is not None:
+            match = self._pattern.search(text)
+            return match.group(0) if match else None
+
+        return None
+
+
+class KeywordClassifier:
+    """Tag a string with every keyword group it mentions in a single pass
+
+    Keywords match anywhere in the text, except in the groups named in
+    whole_word_groups - there "no" is not found in "know" or "snow".
+    """
+
+    def __init__(self, groups, whole_word_groups=()):
+        # keyword -> set of group names it belongs to, split by how it must match
+        self._substring_groups = {}
+        self._whole_word_groups = {}
+        for name, keywords in groups.items():
+            target = self._whole_word_groups if name in whole_word_groups else self._substring_groups
+            for keyword in keywords:
+                target.setdefault(keyword.lower(), set()).add(name)
+
+        self._automaton = None
+        self._patterns = []  # (regex, contained keywords, whole_word) per matching mode
+
+        keywords = self._substring_groups.keys() | self._whole_word_groups.keys()
+        if not keywords:
+            return
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            for table, whole_word in ((self._substring_groups, False), (self._whole_word_groups, True)):
+                if table:
+                    self._patterns.append(self._compile(table, whole_word))
+
+    @staticmethod
+    def _compile(keywords, whole_word):
+        """Overlapping-match regex for one matching mode"""
+        # The regex reports only the longest keyword at each position, so
+        # each keyword also stands for every keyword inside it
+        if whole_word:
+            contained = {
+                keyword: frozenset(other for other in keywords if _whole_word_in(other, keyword))
+                for keyword in keywords
+            }
+            template = r"(?<!\w)(?=({})(?!\w))"
+        else:
+            contained = {
+                keyword: frozenset(other for other in keywords if other in keyword)
+                for keyword in keywords
+            }
+            template = "(?=({}))"
+
+        ordered = sorted(keywords, key=len, reverse=True)
+        return re.compile(template.format("|".join(map(re.escape, ordered)))), contained, whole_word
+
+    def _scan(self, text):
+        """Return (keywords found anywhere in text, keywords found as whole words)"""
+        anywhere = set()
+        whole = set()
+
+        if self._automaton is not None:
+            for end, keyword in self._automaton.iter(text):
+                anywhere.add(keyword)
+                start = end - len(keyword) + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                whole.add(keyword)
+        else:
+            for pattern, contained, whole_word in self._patterns:
+                found = whole if whole_word else anywhere
+                for match in pattern.finditer(text):
+                    found |= contained[match.group(1)]
+
+        return anywhere, whole
+
+    def _hits(self, text):
+        """Yield (keyword, group name) for each group a keyword in text counts toward"""
+        anywhere, whole = self._scan(text)
+        for keyword in anywhere:
+            for name in self._substring_groups.get(keyword, ()):
+                yield keyword, name
+        for keyword in whole:
+            for name in self._whole_word_groups.get(keyword, ()):
+                yield keyword, name
+
+    def find_keywords(self, text):
+        """Return the set of distinct keywords that appear in text"""
+        return {keyword for keyword, _ in self._hits(text)}
+
+    def classify(self, text):
+        """Return the set of group names whose keywords appear in text"""
+        return {name for _, name in self._hits(text)}
+
+    def keywords_by_group(self, text):
+        """Return {group name: set of its keywords found in text}"""
+        hits = {}
+        for keyword, name in self._hits(text):
+            hits.setdefault(name, set()).add(keyword)
+        return hits
\ No newline at end of file
@@ -1,8 +1,24 @@
-import ollama
+# ollama is imported inside the methods that use it - it takes ~0.2 s to import,
+# and the first import now happens on the background verification thread
 from . import config
 import re
 from datetime import datetime
+from itertools import islice
 import requests
+import threading
+from .response_cache import ResponseCache, semantic_tag
+from .keyword_matcher import KeywordMatcher
+
+# Prompts asking for something creative keep sampled (non-deterministic) output
+CREATIVE_MATCHER = KeywordMatcher(config.CREATIVE_KEYWORDS)
+
+# Specific data in a response raises confidence: (pattern, bonus)
+SPECIFIC_DATA_PATTERNS = [
+    (re.compile(r'\d+°[FC]'), 15),
+    (re.compile(r'\d{1,2}/\d{1,2}(/\d{4})?'), 10),
+    (re.compile(r'\$\d+'), 10),
+    (re.compile(r'\d+%'), 8),
+]
 
 class LLMHandler:
     """Handles communication with multiple LLM providers"""
@@ -25,28 +41,95 @@ class LLMHandler:
             except Exception:
                 self.use_gpt_oss = False
         
-        self._verify_ollama_model()
+        # Verify and load the model in the background so startup doesn't wait on it
+        if config.OLLAMA_WARMUP:
+            threading.Thread(target=self._verify_ollama_model, daemon=True).start()
+        
+        # Cache completions so repeated prompts skip the model entirely
+        self.response_cache = None
+        if config.ENABLE_RESPONSE_CACHE:
+            self.response_cache = ResponseCache(
+                embed_fn=self.embed,
+                max_entries=config.RESPONSE_CACHE_SIZE,
+                similarity_threshold=config.SEMANTIC_CACHE_THRESHOLD
+            )
         
         if self.use_ab_testing:
             print("A/B testing enabled")
     
     def _verify_ollama_model(self):
-        """Verify Ollama model exists"""
+        """Verify Ollama model exists - a one-token ping that also loads it into memory"""
+        import ollama
+        
         try:
-            models_response = ollama.list()
-            
-            if isinstance(models_response, dict) and 'models' in models_response:
-                models_list = models_response['models']
-            else:
-                models_list = models_response
-            
-            # Silently verify model exists
-            
+            ollama.chat(
+                model=self.primary_model,
+                messages=[{'role': 'user', 'content': 'hi'}],
+                options={'num_predict': 1},
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+        except ollama.ResponseError as e:
+            if e.status_code == 404:
+                print(f"\n[LLM Error]: Model '{self.primary_model}' not found. Pull it with: ollama pull {self.primary_model}")
         except Exception:
             pass
     
-    def generate(self, prompt, use_search_context=False):
-        """Generate response - try GPT-OSS server first, fallback to Ollama"""
+    def embed(self, text):
+        """Embed text with the configured Ollama embedding model"""
+        import ollama
+        
+        return ollama.embeddings(
+            model=config.EMBEDDING_MODEL,
+            prompt=text,
+            keep_alive=config.OLLAMA_KEEP_ALIVE
+        )['embedding']
+    
+    def embed_batch(self, texts):
+        """Embed several texts with one Ollama request"""
+        import ollama
+        
+        return ollama.embed(
+            model=config.EMBEDDING_MODEL,
+            input=texts,
+            keep_alive=config.OLLAMA_KEEP_ALIVE
+        )['embeddings']
+    
+    def _chat(self, messages, on_token=None, options=None):
+        """Call Ollama, streaming each piece of text to on_token if given"""
+        import ollama
+        
+        options = options or config.MODEL_OPTIONS
+        if on_token is None:
+            response = ollama.chat(
+                model=self.primary_model,
+                messages=messages,
+                options=options,
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+            return response['message']['content']
+        
+        parts = []
+        for chunk in ollama.chat(
+            model=self.primary_model,
+            messages=messages,
+            options=options,
+            keep_alive=config.OLLAMA_KEEP_ALIVE,
+            stream=True
+        ):
+            text = chunk['message']['content']
+            if text:
+                parts.append(text)
+                on_token(text)
+        
+        return "".join(parts)
+    
+    def generate(self, prompt, use_search_context=False, semantic_text=None, on_token=None):
+        """Generate response - try GPT-OSS server first, fallback to Ollama
+        
+        semantic_text: short user-facing text to match paraphrases against
+        in the response cache (skipped for search-backed prompts)
+        on_token: called with each piece of text as Ollama produces it
+        """
         
         # Try GPT-OSS server if available
         if self.use_gpt_oss and self.gpt_oss_available:
@@ -54,13 +137,13 @@ class LLMHandler:
                 return self._generate_gpt_oss_server(prompt, use_search_context)
             except Exception as e:
                 print(f"GPT-OSS failed, falling back to Ollama: {e}")
-                return self._single_generate(prompt, use_search_context)
+                return self._single_generate(prompt, use_search_context, semantic_text, on_token)
         
         # Otherwise use Ollama
         if self.use_ab_testing and use_search_context:
             return self._ab_test_generate(prompt, use_search_context)
         else:
-            return self._single_generate(prompt, use_search_context)
+            return self._single_generate(prompt, use_search_context, semantic_text, on_token)
     
     def _generate_gpt_oss_server(self, prompt, use_search_context):
         """Generate using GPT-OSS server"""
@@ -87,16 +170,21 @@ class LLMHandler:
         else:
             raise Exception(f"Server returned {response.status_code}")
     
-    def generate_with_history(self, prompt, conversation_history):
-        """Generate response with conversation history"""
+    def generate_with_history(self, prompt, conversation_history, on_token=None, semantic_text=None):
+        """Generate response with conversation history
+        
+        semantic_text: the user's own words inside prompt - paraphrases of them
+        in the same conversation state reuse a cached response
+        """
         try:
             system_content = self._get_system_prompt(use_search_context=False)
             
             # Build messages with history
             messages = [{'role': 'system', 'content': system_content}]
             
-            # Add recent history (last 4 messages only)
-            recent_history = conversation_history[-5:-1] if len(conversation_history) > 5 else conversation_history[:-1]
+            # Add recent history (last 4 messages only, excluding the current one) - works for lists and deques
+            count = len(conversation_history)
+            recent_history = islice(conversation_history, max(count - 5, 0), max(count - 1, 0))
             
             for msg in recent_history:
                 messages.append({
@@ -111,38 +199,58 @@ class LLMHandler:
                 'content': f"Today's date is {current_date}. {prompt}"
             })
             
-            response = ollama.chat(
-                model=self.primary_model,
-                messages=messages,
-                options=config.MODEL_OPTIONS
-            )
-            
-            return response['message']['content']
+            return self._cached_chat(messages, semantic_text, on_token)
             
         except Exception as e:
             print(f"[LLM Error]: {str(e)}")
             return f"I'm having trouble connecting to my AI model right now. Please try again."
     
-    def _single_generate(self, prompt, use_search_context):
+    def _single_generate(self, prompt, use_search_context, semantic_text=None, on_token=None):
         """Generate from primary model only"""
         try:
             system_content = self._get_system_prompt(use_search_context)
             
-            response = ollama.chat(
-                model=self.primary_model,
-                messages=[
-                    {'role': 'system', 'content': system_content},
-                    {'role': 'user', 'content': prompt}
-                ],
-                options=config.MODEL_OPTIONS
-            )
-            
-            return response['message']['content']
+            # Search results change over time, so search answers only ever hit exactly
+            return self._cached_chat([
+                {'role': 'system', 'content': system_content},
+                {'role': 'user', 'content': prompt}
+            ], None if use_search_context else semantic_text, on_token)
             
         except Exception as e:
             print(f"[LLM Error]: {str(e)}")
             return f"I'm having trouble connecting to my AI model right now. Please try again."
     
+    def _cached_chat(self, messages, semantic_text=None, on_token=None):
+        """Run _chat behind the response cache - exact hits on the messages, then paraphrases of semantic_text"""
+        # Non-creative prompts are decoded greedily, so their output is repeatable and cacheable
+        deterministic = CREATIVE_MATCHER.search((semantic_text or messages[-1]['content']).lower()) is None
+        options = {**config.MODEL_OPTIONS, **config.DETERMINISTIC_OPTIONS} if deterministic else None
+        
+        cache = self.response_cache if deterministic else None
+        if not cache:
+            return self._chat(messages, on_token, options)
+        
+        # Exact hit - identical model and messages
+        cache_key = ResponseCache.make_key(self.primary_model, messages[0]['content'], messages[1:])
+        cached = cache.get(cache_key)
+        
+        # Semantic hit - same surrounding prompt and history, same names and numbers, similar wording
+        vector = None
+        tag = None
+        if cached is None and semantic_text:
+            vector = cache.embed(semantic_text)
+            tag = semantic_tag("\n".join(message['content'] for message in messages), semantic_text)
+            cached = cache.get_similar(vector, tag)
+        
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached
+        
+        content = self._chat(messages, on_token, options)
+        cache.put(cache_key, content, vector, tag)
+        return content
+    
     def _ab_test_generate(self, prompt, use_search_context):
         """A/B test: compare responses from different sources"""
         responses = []
@@ -219,14 +327,9 @@ class LLMHandler:
         confidence += (certainty_count * 8)
         
         # Specific data (increase)
-        if re.search(r'\d+°[FC]', response):
-            confidence += 15
-        if re.search(r'\d{1,2}/\d{1,2}(/\d{4})?', response):
-            confidence += 10
-        if re.search(r'\$\d+', response):
-            confidence += 10
-        if re.search(r'\d+%', response):
-            confidence += 8
+        for pattern, bonus in SPECIFIC_DATA_PATTERNS:
+            if pattern.search(response):
+                confidence += bonus
         
         # Length check
         if len(response) < 50:
@@ -144,7 +144,7 @@ class PersistentMemory:
         """Save current conversation"""
         self.memory["conversations"].append({
             "timestamp": datetime.now().isoformat(),
-            "messages": conversation_history[-20:]
+            "messages": list(conversation_history)[-20:]  # Accepts the assistant's history deque too
         })
         
         # Keep only last 10 conversations
@@ -1,8 +1,11 @@
+import gzip
 import json
 import os
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 import re
+import threading
+from .keyword_matcher import KeywordMatcher
 
 try:
     import chromadb
@@ -12,6 +15,12 @@ except ImportError as e:
     CHROMADB_AVAILABLE = False
     CHROMADB_ERROR = str(e)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # ============================================================================
 # BASE CLASSES
@@ -29,6 +38,13 @@ class MemoryBackend(ABC):
     @abstractmethod
     def get_all_facts(self):
         pass
+    
+    def get_recent_facts(self, limit=10):
+        """Newest facts last; backends should override with a native limit"""
+        return self.get_all_facts()[-limit:]
+    
+    def count_facts(self):
+        return len(self.get_all_facts())
 
 
 class LearningEngine(ABC):
@@ -53,6 +69,8 @@ class JSONMemoryBackend(MemoryBackend):
     def __init__(self, filepath):
         self.filepath = filepath
         self.data = self._load()
+        self.write_version = 0  # Bumped whenever a fact is added or changed
+        self._lock = threading.RLock()
     
     def _load(self):
         if os.path.exists(self.filepath):
@@ -64,37 +82,42 @@ class JSONMemoryBackend(MemoryBackend):
         return {"facts": [], "metadata": {}}
     
     def _save(self):
-        with open(self.filepath, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        with self._lock:
+            with open(self.filepath, 'w') as f:
+                json.dump(self.data, f, indent=2)
     
     def save_fact(self, fact, category, metadata=None):
-        # Check for duplicates with better matching
-        fact_lower = fact.lower().strip()
-        for existing in self.data["facts"]:
-            existing_lower = existing["fact"].lower().strip()
-            # More lenient duplicate checking
-            if self._are_similar(fact_lower, existing_lower):
-                # Update if new fact is more specific
-                if len(fact) > len(existing["fact"]):
-                    existing["fact"] = fact
-                    existing["timestamp"] = datetime.now().isoformat()
-                    existing["metadata"] = metadata or {}
-                    self._save()
-                return False
-        
-        fact_entry = {
-            "fact": fact,
-            "category": category,
-            "timestamp": datetime.now().isoformat(),
-            "access_count": 0,
-            "last_accessed": None,
-            "metadata": metadata or {}
-        }
+        # Learning may run on a background thread - one writer at a time
+        with self._lock:
+            # Check for duplicates with better matching
+            fact_lower = fact.lower().strip()
+            for existing in self.data["facts"]:
+                existing_lower = existing["fact"].lower().strip()
+                # More lenient duplicate checking
+                if self._are_similar(fact_lower, existing_lower):
+                    # Update if new fact is more specific
+                    if len(fact) > len(existing["fact"]):
+                        existing["fact"] = fact
+                        existing["timestamp"] = datetime.now().isoformat()
+                        existing["metadata"] = metadata or {}
+                        self.write_version += 1
+                        self._save()
+                    return False
+            
+            fact_entry = {
+                "fact": fact,
+                "category": category,
+                "timestamp": datetime.now().isoformat(),
+                "access_count": 0,
+                "last_accessed": None,
+                "metadata": metadata or {}
+            }
+            
+            self.data["facts"].append(fact_entry)
+            self.write_version += 1
+            self._save()
+            return True
         
-        self.data["facts"].append(fact_entry)
-        self._save()
-        return True
-    
     def _are_similar(self, fact1, fact2):
         """Check if two facts are similar enough to be duplicates"""
         # Exact match
@@ -145,24 +168,26 @@ class JSONMemoryBackend(MemoryBackend):
             if word in keyword_map:
                 expanded_keywords.update(keyword_map[word])
         
-        for fact in self.data["facts"]:
-            fact_lower = fact["fact"].lower()
-            
-            # Prioritize exact category matches
-            if fact["category"] == "identity" and any(k in query_lower for k in ['birthday', 'born', 'age']):
+        # Access counts are updated in place and saved - same lock as save_fact
+        with self._lock:
+            for fact in self.data["facts"]:
+                fact_lower = fact["fact"].lower()
+                
+                # Prioritize exact category matches
+                if fact["category"] == "identity" and any(k in query_lower for k in ['birthday', 'born', 'age']):
+                    if any(keyword in fact_lower for keyword in expanded_keywords):
+                        fact["access_count"] = fact.get("access_count", 0) + 1
+                        fact["last_accessed"] = datetime.now().isoformat()
+                        relevant.insert(0, fact)  # Put at front
+                        continue
+                
+                # Check if any expanded keyword matches
                 if any(keyword in fact_lower for keyword in expanded_keywords):
                     fact["access_count"] = fact.get("access_count", 0) + 1
                     fact["last_accessed"] = datetime.now().isoformat()
-                    relevant.insert(0, fact)  # Put at front
-                    continue
+                    relevant.append(fact)
             
-            # Check if any expanded keyword matches
-            if any(keyword in fact_lower for keyword in expanded_keywords):
-                fact["access_count"] = fact.get("access_count", 0) + 1
-                fact["last_accessed"] = datetime.now().isoformat()
-                relevant.append(fact)
-        
-        self._save()
+            self._save()
         
         # Sort by access count and recency
         relevant.sort(key=lambda x: (x.get("access_count", 0), x["timestamp"]), reverse=True)
@@ -171,6 +196,12 @@ class JSONMemoryBackend(MemoryBackend):
     
     def get_all_facts(self):
         return self.data["facts"]
+    
+    def get_recent_facts(self, limit=10):
+        return self.data["facts"][-limit:] if limit > 0 else []
+    
+    def count_facts(self):
+        return len(self.data["facts"])
 
 
 class LLMBasedLearning(LearningEngine):
@@ -187,6 +218,7 @@ class LLMBasedLearning(LearningEngine):
             "okay", "ok", "cool", "nice", "great",
             "i see", "got it", "understood", "alright"
         ]
+        self.ignore_matcher = KeywordMatcher(self.ignore_phrases)
     
     def extract_facts(self, text, context=None):
         """Use LLM to extract IMPORTANT facts only"""
@@ -197,11 +229,11 @@ class LLMBasedLearning(LearningEngine):
         
         # Skip trivial responses
         text_lower = text.lower().strip()
-        if any(phrase in text_lower for phrase in self.ignore_phrases):
+        if self.ignore_matcher.search(text_lower) is not None:
             return []
         
         # Skip questions
-        if any(text_lower.startswith(q) for q in ['what', 'where', 'when', 'who', 'why', 'how', 'is', 'are', 'do', 'does', 'can', 'could', 'would']):
+        if text_lower.startswith(('what', 'where', 'when', 'who', 'why', 'how', 'is', 'are', 'do', 'does', 'can', 'could', 'would')):
             return []
         
         # Enhanced prompt for better extraction
@@ -250,7 +282,7 @@ JSON only:"""
                         continue
                     
                     # Skip if contains trivial phrases
-                    if any(phrase in fact_text for phrase in self.ignore_phrases):
+                    if self.ignore_matcher.search(fact_text) is not None:
                         continue
                     
                     # Fact must be substantial
@@ -267,6 +299,45 @@ JSON only:"""
         return []
 
 
+def _compile_patterns(patterns):
+    """Precompile (pattern, category, confidence, template) tuples once at import"""
+    return [(re.compile(pattern, re.IGNORECASE), category, confidence, template)
+            for pattern, category, confidence, template in patterns]
+
+
+# Pattern: Birthday (with clear subject identification)
+BIRTHDAY_PATTERNS = _compile_patterns([
+    (r"my birthday is ([A-Z][a-z]+ \d{1,2},? \d{4})", "identity", 0.95, "User's birthday is {}"),
+    (r"i was born (?:on )?([A-Z][a-z]+ \d{1,2},? \d{4})", "identity", 0.95, "User's birthday is {}"),
+    (r"my (?:dog|cat|pet)(?:'s)? birthday is ([A-Z][a-z]+ \d{1,2})", "relationships", 0.90, "User's pet's birthday is {}"),
+])
+
+# Pattern: Name
+NAME_PATTERNS = _compile_patterns([
+    (r"(?:my name is|i'm|i am|call me)\s+([A-Z][a-z]+)", "identity", 0.90, "User's name is {}"),
+])
+
+# Pattern: Location
+LOCATION_PATTERNS = _compile_patterns([
+    (r"i live in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", "identity", 0.88, "User lives in {}"),
+    (r"i'm from ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", "identity", 0.88, "User is from {}"),
+])
+
+# Pattern: Strong preferences (avoid weak ones)
+STRONG_PREFERENCE_PATTERNS = _compile_patterns([
+    (r"i (?:really love|absolutely love|love)\s+([a-z\s]{3,30})(?:\.|!|,)", "preferences", 0.88, "User loves {}"),
+    (r"my favorite\s+(?:food|game|movie|book|color)\s+is\s+([^.!?,]+)", "preferences", 0.92, "User's favorite is {}"),
+])
+
+# CRITICAL: Skip trivial responses
+TRIVIAL_PHRASES = [
+    "i'm fine", "i'm okay", "i'm good", "i'm alright",
+    "sounds good", "that's fine", "no problem", "sure",
+    "yes", "no", "maybe", "thanks", "okay", "ok", "cool"
+]
+TRIVIAL_MATCHER = KeywordMatcher(TRIVIAL_PHRASES)
+
+
 class PatternBasedLearning(LearningEngine):
     """Pattern recognition - IMPROVED"""
     
@@ -276,27 +347,15 @@ class PatternBasedLearning(LearningEngine):
         text_lower = text.lower()
         
         # CRITICAL: Skip trivial responses
-        trivial = [
-            "i'm fine", "i'm okay", "i'm good", "i'm alright",
-            "sounds good", "that's fine", "no problem", "sure",
-            "yes", "no", "maybe", "thanks", "okay", "ok", "cool"
-        ]
-        if any(phrase in text_lower for phrase in trivial):
+        if TRIVIAL_MATCHER.search(text_lower) is not None:
             return []
         
         # Skip questions
-        if any(text_lower.strip().startswith(q) for q in ['what', 'where', 'when', 'who', 'why', 'how', 'is', 'are', 'do', 'does']):
+        if text_lower.strip().startswith(('what', 'where', 'when', 'who', 'why', 'how', 'is', 'are', 'do', 'does')):
             return []
         
-        # Pattern: Birthday (with clear subject identification)
-        birthday_patterns = [
-            (r"my birthday is ([A-Z][a-z]+ \d{1,2},? \d{4})", "identity", 0.95, "User's birthday is {}"),
-            (r"i was born (?:on )?([A-Z][a-z]+ \d{1,2},? \d{4})", "identity", 0.95, "User's birthday is {}"),
-            (r"my (?:dog|cat|pet)(?:'s)? birthday is ([A-Z][a-z]+ \d{1,2})", "relationships", 0.90, "User's pet's birthday is {}"),
-        ]
-        
-        for pattern, category, confidence, fact_template in birthday_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, category, confidence, fact_template in BIRTHDAY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 date = match.group(1).strip()
                 fact = fact_template.format(date)
@@ -306,13 +365,8 @@ class PatternBasedLearning(LearningEngine):
                     "confidence": confidence
                 })
         
-        # Pattern: Name
-        name_patterns = [
-            (r"(?:my name is|i'm|i am|call me)\s+([A-Z][a-z]+)", "identity", 0.90, "User's name is {}"),
-        ]
-        
-        for pattern, category, confidence, fact_template in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, category, confidence, fact_template in NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 name = match.group(1).strip()
                 if name not in ['Fine', 'Okay', 'Good', 'Alright']:  # Don't learn "I'm Fine" as name
@@ -323,14 +377,8 @@ class PatternBasedLearning(LearningEngine):
                         "confidence": confidence
                     })
         
-        # Pattern: Location
-        location_patterns = [
-            (r"i live in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", "identity", 0.88, "User lives in {}"),
-            (r"i'm from ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", "identity", 0.88, "User is from {}"),
-        ]
-        
-        for pattern, category, confidence, fact_template in location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, category, confidence, fact_template in LOCATION_PATTERNS:
+            match = pattern.search(text)
             if match:
                 location = match.group(1).strip()
                 fact = fact_template.format(location)
@@ -340,18 +388,12 @@ class PatternBasedLearning(LearningEngine):
                     "confidence": confidence
                 })
         
-        # Pattern: Strong preferences (avoid weak ones)
-        strong_preference_patterns = [
-            (r"i (?:really love|absolutely love|love)\s+([a-z\s]{3,30})(?:\.|!|,)", "preferences", 0.88, "User loves {}"),
-            (r"my favorite\s+(?:food|game|movie|book|color)\s+is\s+([^.!?,]+)", "preferences", 0.92, "User's favorite is {}"),
-        ]
-        
-        for pattern, category, confidence, fact_template in strong_preference_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, category, confidence, fact_template in STRONG_PREFERENCE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 thing = match.group(1).strip()
                 # Must be substantial
-                if len(thing) > 3 and thing not in trivial:
+                if len(thing) > 3 and thing not in TRIVIAL_PHRASES:
                     fact = fact_template.format(thing)
                     facts.append({
                         "fact": fact,
@@ -470,6 +512,10 @@ class ModularMemorySystem:
             "session_start": datetime.now().isoformat()
         }
         
+        # get_stats() result, reused until storage or session counters change
+        self._stats_cache = None
+        self._stats_version = None
+        
         print(f"✓ Memory system initialized")
         print(f"  - Storage: {type(self.storage).__name__}")
         print(f"  - Learning engines: {len(self.learning_engines)}")
@@ -566,9 +612,13 @@ class ModularMemorySystem:
     
     def get_stats(self):
         """Get memory statistics"""
+        version = (getattr(self.storage, 'write_version', None), self.stats['total_learned'])
+        if self._stats_cache is not None and version == self._stats_version:
+            return self._stats_cache
+        
         all_facts = self.storage.get_all_facts()
         
-        return {
+        self._stats_cache = {
             "total_facts": len(all_facts),
             "learned_this_session": self.stats['total_learned'],
             "by_category": self.stats['by_category'],
@@ -577,22 +627,39 @@ class ModularMemorySystem:
             "learning_engines": [type(e).__name__ for e in self.learning_engines],
             "semantic_search": self.context_retriever is not None
         }
+        self._stats_version = version
+        return self._stats_cache
     
-    def export_training_data(self, filepath):
-        """Export all facts for fine-tuning"""
+    def export_training_data(self, filepath, stats=None):
+        """Export all facts for fine-tuning - a .jsonl.gz path gets a metadata line then one fact per line"""
         all_facts = self.storage.get_all_facts()
         
-        training_data = {
-            "metadata": {
-                "exported": datetime.now().isoformat(),
-                "total_facts": len(all_facts),
-                "format": "jarvis_v1"
-            },
-            "facts": all_facts
+        metadata = {
+            "exported": datetime.now().isoformat(),
+            "total_facts": len(all_facts),
+            "format": "jarvis_v1"
         }
-        
-        with open(filepath, 'w') as f:
-            json.dump(training_data, f, indent=2)
+        if stats is not None:
+            metadata["stats"] = stats
+        
+        if filepath.endswith(".jsonl.gz"):
+            # Compact lines through one handle - level 1 gzip is nearly free but still shrinks the text a lot
+            if ORJSON_AVAILABLE:
+                dumps = orjson.dumps
+            else:
+                def dumps(obj):
+                    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            
+            with gzip.open(filepath, 'wb', compresslevel=1) as f:
+                f.write(dumps({"metadata": metadata}) + b"\n")
+                f.writelines(dumps(fact) + b"\n" for fact in all_facts)
+        elif ORJSON_AVAILABLE:
+            # One C-side serialization and a single write
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps({"metadata": metadata, "facts": all_facts}, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump({"metadata": metadata, "facts": all_facts}, f, indent=2)
         
         print(f"✓ Exported {len(all_facts)} facts to {filepath}")
         
@@ -4,6 +4,9 @@ from datetime import datetime
 import random
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import config
 
 
 class NewsAggregator:
@@ -42,6 +45,13 @@ class NewsAggregator:
         # Store the last news summary with indexed topics
         self.last_summary = None
         self.indexed_topics = {}
+        
+        # Categories and sources are fetched concurrently - latency is the slowest site, not the sum
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news")
+        
+        # Last fetched headlines: (time.monotonic(), summary) - one fetch runs at a time
+        self._cached = None
+        self._refresh_lock = threading.Lock()
     
     def _get_headers(self):
         """Random user agent to avoid blocking"""
@@ -52,7 +62,47 @@ class NewsAggregator:
         }
     
     def get_daily_summary(self):
-        """Get today's news summary from all categories"""
+        """Get today's news summary - served from the cache, refetched in the background once stale"""
+        today = datetime.now().strftime("%B %d, %Y")
+        
+        cached = self._cached
+        if cached is None or cached[1]['date'] != today:
+            # Nothing usable yet - wait for a fetch (or the prefetch already running)
+            with self._refresh_lock:
+                cached = self._cached
+                if cached is None or cached[1]['date'] != today:
+                    summary = self._fetch_summary(verbose=True)
+                    cached = self._store(summary)
+        elif time.monotonic() - cached[0] > config.NEWS_CACHE_TTL:
+            # Show these headlines now and have newer ones ready for next time
+            threading.Thread(target=self.refresh, daemon=True).start()
+        
+        summary = cached[1] if cached else summary
+        
+        # Store and index topics - only what the user sees, so 'more 3' means the story they saw
+        self.last_summary = summary
+        self._index_topics(summary)
+        
+        return summary
+    
+    def refresh(self):
+        """Fetch headlines quietly into the cache (skipped if a fetch is already running)"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._store(self._fetch_summary(verbose=False))
+        finally:
+            self._refresh_lock.release()
+    
+    def _store(self, summary):
+        """Cache a summary unless every category failed, returning the cache entry"""
+        if not any(summary[category] for category in ['general', 'tech', 'business', 'science']):
+            return None
+        self._cached = (time.monotonic(), summary)
+        return self._cached
+    
+    def _fetch_summary(self, verbose):
+        """Fetch today's headlines from all categories"""
         today = datetime.now().strftime("%B %d, %Y")
         
         summary = {
@@ -63,23 +113,25 @@ class NewsAggregator:
             'science': []
         }
         
-        print("Fetching news from reputable sources...")
+        if verbose:
+            print("Fetching news from reputable sources...")
         
-        # Fetch from each category
-        for category in ['general', 'tech', 'business', 'science']:
-            print(f"   - {category.capitalize()}...", end=" ", flush=True)
+        # Fire every category at once, then report them in order
+        categories = ['general', 'tech', 'business', 'science']
+        futures = [(category, self._executor.submit(self._fetch_category, category)) for category in categories]
+        for category, future in futures:
+            if verbose:
+                print(f"   - {category.capitalize()}...", end=" ", flush=True)
             try:
-                headlines = self._fetch_category(category)
+                headlines = future.result()
                 summary[category] = headlines[:8]  # Top 8 per category
-                print(f"✓ ({len(headlines)} stories)")
+                if verbose:
+                    print(f"✓ ({len(headlines)} stories)")
             except Exception as e:
-                print(f"✗ (failed)")
+                if verbose:
+                    print(f"✗ (failed)")
                 summary[category] = []
         
-        # Store and index topics
-        self.last_summary = summary
-        self._index_topics(summary)
-        
         return summary
     
     def _index_topics(self, summary):
@@ -146,49 +198,49 @@ class NewsAggregator:
         
         # Try to fetch multiple articles about this topic
         sources_to_try = self.sources[category][:2]  # Try first 2 sources
+        key_terms = self._extract_key_terms(headline)
         
-        for source_url in sources_to_try:
+        # Query the sources together, then take their articles in source order
+        futures = [self._executor.submit(self._fetch_related, source_url, key_terms) for source_url in sources_to_try]
+        for future in futures:
             try:
-                # For now, we'll use web search to find related articles
-                # In production, you'd want to use the actual article URLs
-                response = requests.get(
-                    source_url,
-                    headers=self._get_headers(),
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find articles mentioning key terms from headline
-                    key_terms = self._extract_key_terms(headline)
-                    
-                    # Parse based on source
-                    if 'reuters.com' in source_url:
-                        articles = self._find_related_reuters(soup, key_terms)
-                    elif 'apnews.com' in source_url:
-                        articles = self._find_related_ap(soup, key_terms)
-                    elif 'bbc.com' in source_url:
-                        articles = self._find_related_bbc(soup, key_terms)
-                    elif 'arstechnica.com' in source_url:
-                        articles = self._find_related_ars(soup, key_terms)
-                    elif 'theverge.com' in source_url:
-                        articles = self._find_related_verge(soup, key_terms)
-                    else:
-                        articles = []
-                    
-                    details['articles'].extend(articles)
-                    
-                    if len(details['articles']) >= 3:
-                        break
-                
-                time.sleep(0.5)
-                
+                details['articles'].extend(future.result())
             except Exception as e:
                 continue
+            
+            if len(details['articles']) >= 3:
+                break
         
         return details if details['articles'] else None
     
+    def _fetch_related(self, source_url, key_terms):
+        """Fetch one source's front page and find articles mentioning the key terms"""
+        # For now, we'll use web search to find related articles
+        # In production, you'd want to use the actual article URLs
+        response = requests.get(
+            source_url,
+            headers=self._get_headers(),
+            timeout=10
+        )
+        
+        if response.status_code != 200:
+            return []
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Parse based on source
+        if 'reuters.com' in source_url:
+            return self._find_related_reuters(soup, key_terms)
+        elif 'apnews.com' in source_url:
+            return self._find_related_ap(soup, key_terms)
+        elif 'bbc.com' in source_url:
+            return self._find_related_bbc(soup, key_terms)
+        elif 'arstechnica.com' in source_url:
+            return self._find_related_ars(soup, key_terms)
+        elif 'theverge.com' in source_url:
+            return self._find_related_verge(soup, key_terms)
+        return []
+    
     def _extract_key_terms(self, headline):
         """Extract important keywords from headline"""
         # Remove common words
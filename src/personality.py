@@ -2,6 +2,16 @@ import json
 import os
 from datetime import datetime
 from collections import Counter
+from .keyword_matcher import KeywordClassifier
+
+# Tone indicators, matched together in one pass over each message
+TONE_CLASSIFIER = KeywordClassifier({
+    'casual': ['lol', 'haha', 'yeah', 'yep', 'nah', 'gonna', 'wanna', 'kinda'],
+    'formal': ['please', 'thank you', 'would you', 'could you', 'appreciate'],
+    'humorous': ['lmao', 'lol', 'haha', 'funny'],
+    'technical': ['code', 'function', 'algorithm', 'data', 'system', 'process'],
+    'emotional': ['feel', 'worried', 'excited', 'stressed', 'happy', 'sad'],
+})
 
 
 class PersonalityEngine:
@@ -31,6 +41,15 @@ class PersonalityEngine:
         self.conversation_topics = self.personality.get('topics', [])
         self.user_tone_history = self.personality.get('user_tone', [])
         
+        # Traits the user has set by hand - evolution leaves these alone
+        self.manually_adjusted_traits = {
+            adj['trait'] for adj in self.personality.get('manual_adjustments', [])
+        }
+        
+        # Last built system prompt and the trait values / experience stage it was built from
+        self._prompt_key = None
+        self._prompt = None
+        
     def _load_personality(self):
         """Load personality from file"""
         if os.path.exists(self.personality_file):
@@ -56,36 +75,17 @@ class PersonalityEngine:
     
     def analyze_user_tone(self, message):
         """Analyze user's communication style to adapt"""
-        msg_lower = message.lower()
+        hits = TONE_CLASSIFIER.keywords_by_group(message.lower())
         
+        # Number of distinct indicator words per tone (humor only counts once)
         tone = {
-            'casual': 0,
-            'formal': 0,
-            'humorous': 0,
-            'technical': 0,
-            'emotional': 0
+            'casual': len(hits.get('casual', ())),
+            'formal': len(hits.get('formal', ())),
+            'humorous': 1 if 'humorous' in hits else 0,
+            'technical': len(hits.get('technical', ())),
+            'emotional': len(hits.get('emotional', ()))
         }
         
-        # Casual indicators
-        casual_words = ['lol', 'haha', 'yeah', 'yep', 'nah', 'gonna', 'wanna', 'kinda']
-        tone['casual'] = sum(1 for w in casual_words if w in msg_lower)
-        
-        # Formal indicators
-        formal_words = ['please', 'thank you', 'would you', 'could you', 'appreciate']
-        tone['formal'] = sum(1 for w in formal_words if w in msg_lower)
-        
-        # Humorous indicators
-        if any(word in msg_lower for word in ['lmao', 'lol', 'haha', 'funny']):
-            tone['humorous'] += 1
-        
-        # Technical indicators
-        tech_words = ['code', 'function', 'algorithm', 'data', 'system', 'process']
-        tone['technical'] = sum(1 for w in tech_words if w in msg_lower)
-        
-        # Emotional indicators
-        emotion_words = ['feel', 'worried', 'excited', 'stressed', 'happy', 'sad']
-        tone['emotional'] = sum(1 for w in emotion_words if w in msg_lower)
-        
         return tone
     
     def evolve_personality(self, user_message, conversation_context=None):
@@ -96,9 +96,8 @@ class PersonalityEngine:
         tone = self.analyze_user_tone(user_message)
         self.user_tone_history.append(tone)
         
-        # Check if there are any manual adjustments - those take priority
-        manual_adjustments = self.personality.get('manual_adjustments', [])
-        manually_adjusted_traits = {adj['trait'] for adj in manual_adjustments}
+        # Manual adjustments take priority
+        manually_adjusted_traits = self.manually_adjusted_traits
         
         # Adapt personality gradually (small changes each time)
         if self.interaction_count > 10:
@@ -131,6 +130,22 @@ class PersonalityEngine:
             self._save_personality()
     
     def get_system_prompt_modifier(self):
+        """Personality-adjusted system prompt - rebuilt only when a trait or the experience stage changes"""
+        if self.interaction_count < 50:
+            stage = 0
+        elif self.interaction_count < 200:
+            stage = 1
+        else:
+            stage = 2
+        
+        key = (*self.traits.values(), stage)
+        if key != self._prompt_key:
+            self._prompt = self._build_system_prompt()
+            self._prompt_key = key
+        
+        return self._prompt
+    
+    def _build_system_prompt(self):
         """Generate personality-adjusted system prompt with STRONG effects"""
         
         # Base prompt with CORRECT DATE
@@ -217,7 +232,7 @@ class PersonalityEngine:
     
     def adjust_trait(self, trait_name, new_value):
         """Manually adjust a personality trait"""
-        trait_name = trait_name.lower()
+        trait_name = trait_name.strip(" .,!?:;'\"").lower()
         
         if trait_name not in self.traits:
             return False, f"Unknown trait. Available: {', '.join(self.traits.keys())}"
@@ -248,6 +263,7 @@ class PersonalityEngine:
             'new_value': new_value,
             'timestamp': datetime.now().isoformat()
         })
+        self.manually_adjusted_traits.add(trait_name)
         
         self._save_personality()
         return True, f"Updated {trait_name} from {old_value} to {new_value}"
@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Token-bucket rate limiter - only blocks when calls exceed the rate"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity  # Maximum burst size
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            
+            wait = 0.0
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+            
+            # Reserve the token now so concurrent callers queue up behind us
+            self.tokens -= 1
+        
+        if wait > 0:
+            time.sleep(wait)
+        
+        return wait
\ No newline at end of file
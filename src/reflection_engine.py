@@ -1,6 +1,19 @@
 import json
 import os
 from datetime import datetime
+from .keyword_matcher import KeywordMatcher
+
+# Uncertainty markers in a response
+UNCERTAINTY_PHRASES = KeywordMatcher([
+    "i'm not sure", "i don't know", "unclear", "uncertain",
+    "might be", "possibly", "perhaps", "maybe", "could be"
+])
+
+# Queries that deserve a longer answer
+COMPLEX_INDICATORS = KeywordMatcher([
+    'why', 'how does', 'explain', 'compare', 'analyze',
+    'what happens if', 'difference between', 'relationship between'
+])
 
 
 class ReflectionEngine:
@@ -53,20 +66,10 @@ class ReflectionEngine:
         query_lower = user_query.lower()
         
         # Check for uncertainty markers
-        uncertainty_phrases = [
-            "i'm not sure", "i don't know", "unclear", "uncertain",
-            "might be", "possibly", "perhaps", "maybe", "could be"
-        ]
-        
-        has_uncertainty = any(phrase in response_lower for phrase in uncertainty_phrases)
+        has_uncertainty = UNCERTAINTY_PHRASES.search(response_lower) is not None
         
         # Check for complex queries
-        complex_indicators = [
-            'why', 'how does', 'explain', 'compare', 'analyze',
-            'what happens if', 'difference between', 'relationship between'
-        ]
-        
-        is_complex = any(indicator in query_lower for indicator in complex_indicators)
+        is_complex = COMPLEX_INDICATORS.search(query_lower) is not None
         
         # Check if response is very short for a complex query
         is_too_brief = is_complex and len(initial_response.split()) < 30
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Words that say nothing about *which* thing is asked about (pronouns do - "my name" vs "your name")
+GENERIC_WORDS = frozenset('''
+a an and or but if of in on at to for from by with about as into than then
+is are was were be been being am do does did doing have has had will would can could should
+what whats which who whom whose when where why how s t ll re ve d m
+the this that these those there here some any all much many more most very just also
+please tell show give get find know let like want need say look up out
+now today tonight currently current right latest recent
+'''.split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def query_signature(text):
+    """Names, tickers and numbers in a query - paraphrases must agree on these"""
+    return frozenset(word for word in WORD_PATTERN.findall(text.lower()) if word not in GENERIC_WORDS)
+
+
+def semantic_tag(scaffold, text):
+    """What a semantic hit must share exactly: the prompt around the user's words, and the signature of those words"""
+    around = hashlib.sha256(scaffold.replace(text, "").encode("utf-8")).hexdigest()
+    return around, query_signature(text)
+
+
+class SemanticIndex:
+    """Embedding-keyed store - returns the value whose key is most similar"""
+
+    def __init__(self, max_entries=256, similarity_threshold=0.92):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._vectors = None  # (N, D) matrix of L2-normalized embeddings
+        self._values = []
+        self._tags = []  # Entries only match lookups with an equal tag
+
+        # Chat and background learning both generate - keep vectors, values and tags in step
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    @staticmethod
+    def normalize(embedding):
+        """Convert an embedding to a unit-length float32 vector"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, tag=None):
+        """Return (value, similarity) of the closest entry with this tag above threshold"""
+        if vector is None:
+            return None, 0.0
+
+        with self._lock:
+            if self._vectors is None:
+                return None, 0.0
+
+            candidates = [i for i, entry_tag in enumerate(self._tags) if entry_tag == tag]
+            if not candidates:
+                return None, 0.0
+
+            similarities = self._vectors[candidates] @ vector
+            index = int(similarities.argmax())
+            similarity = float(similarities[index])
+
+            if similarity >= self.similarity_threshold:
+                return self._values[candidates[index]], similarity
+            return None, similarity
+
+    def add(self, vector, value, tag=None):
+        """Store a value under an already-normalized embedding"""
+        if vector is None:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vector[np.newaxis, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._values.append(value)
+            self._tags.append(tag)
+
+            # Drop the oldest entries once over capacity
+            overflow = len(self._values) - self.max_entries
+            if overflow > 0:
+                self._vectors = self._vectors[overflow:]
+                del self._values[:overflow]
+                del self._tags[:overflow]
+
+    def clear(self):
+        with self._lock:
+            self._vectors = None
+            self._values = []
+            self._tags = []
+
+
+class ResponseCache:
+    """Two-tier LLM response cache: exact prompt hash, then embedding similarity"""
+
+    def __init__(self, embed_fn=None, max_entries=256, similarity_threshold=0.92):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self._exact = OrderedDict()
+        self._lock = threading.Lock()  # Guards _exact - learning generates on its own thread
+
+        self.semantic = None
+        if embed_fn and NUMPY_AVAILABLE:
+            self.semantic = SemanticIndex(max_entries, similarity_threshold)
+
+    @staticmethod
+    def make_key(model, system_content, prompt):
+        """SHA-256 over everything that determines the model output"""
+        payload = json.dumps({"m": model, "s": system_content, "p": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Exact-match lookup"""
+        with self._lock:
+            if key not in self._exact:
+                return None
+            self._exact.move_to_end(key)
+            return self._exact[key]
+
+    def embed(self, text):
+        """Embed text for the semantic tier (None if unavailable)"""
+        if self.semantic is None or not text:
+            return None
+
+        try:
+            return SemanticIndex.normalize(self.embed_fn(text))
+        except Exception:
+            # Embedding model missing or unreachable - stop trying this session
+            self.semantic = None
+            return None
+
+    def get_similar(self, vector, tag=None):
+        """Semantic lookup for a vector returned by embed()"""
+        semantic = self.semantic
+        if semantic is None:
+            return None
+        value, _ = semantic.lookup(vector, tag)
+        return value
+
+    def put(self, key, response, vector=None, tag=None):
+        """Store a response under its exact key (and embedding if given)"""
+        with self._lock:
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+        semantic = self.semantic
+        if semantic is not None and vector is not None:
+            semantic.add(vector, response, tag)
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+        semantic = self.semantic
+        if semantic is not None:
+            semantic.clear()
\ No newline at end of file
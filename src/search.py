@@ -1,23 +1,41 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 from . import config
 import time
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import random
 import urllib.parse
 import json
+import hashlib
+import re
 import subprocess
 import platform
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .keyword_matcher import KeywordMatcher
+from .rate_limiter import TokenBucket
+
+# Built once at import - shared by every WebSearch instance
+SEARCH_KEYWORD_MATCHER = KeywordMatcher(config.SEARCH_KEYWORDS)
+PRICE_KEYWORD_MATCHER = KeywordMatcher(['bitcoin', 'btc', 'crypto', 'price', '$'])
 
 
 class WebSearch:
     """Multi-source web search with unlimited usage - NO CONSOLE FLASH"""
     
-    def __init__(self):
+    def __init__(self, embed_fn=None):
         self.search_keywords = config.SEARCH_KEYWORDS
-        self.credible_domains = config.CREDIBLE_DOMAINS
+        self.credible_domains = frozenset(config.CREDIBLE_DOMAINS)
         self.max_results = config.SEARCH_MAX_RESULTS
         self.timeout = config.SEARCH_TIMEOUT
         self.system = platform.system()
@@ -29,11 +47,46 @@ class WebSearch:
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
         ]
+        
+        # Pooled session - reuses TCP/TLS connections between searches
+        self._session = None
+        self._session_created = 0
+        self._session_lock = threading.Lock()
+        
+        # Only throttles bursts - an occasional search goes out immediately
+        self._bucket = TokenBucket(rate=config.SEARCH_RATE_LIMIT, capacity=config.SEARCH_BURST)
+        
+        # Recent results keyed by (query, UTC hour) -> (expires_at, result)
+        self._result_cache = OrderedDict()
+        
+        # Optional batch embedder (list of texts -> list of vectors) for relevance reranking
+        self.embed_fn = embed_fn if NUMPY_AVAILABLE and config.SEARCH_RERANK else None
+        self._embedding_cache = OrderedDict()
+        
+        # Engines are queried concurrently - latency is the fastest usable one, not the sum
+        self._executor = None
+        if config.SEARCH_PARALLEL:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+    
+    def _get_session(self):
+        """Get the shared HTTP session, rebuilding it periodically to rotate cookies"""
+        with self._session_lock:
+            now = time.monotonic()
+            if self._session is None or now - self._session_created > config.SEARCH_SESSION_REFRESH:
+                # Old session is left to finish any in-flight requests from other engines
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                
+                self._session = session
+                self._session_created = now
+            
+            return self._session
     
     def needs_search(self, query):
         """Determine if query requires web search"""
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in self.search_keywords)
+        return SEARCH_KEYWORD_MATCHER.search(query.lower()) is not None
     
     def _get_headers(self):
         """Get randomized headers to avoid blocking"""
@@ -66,50 +119,93 @@ class WebSearch:
         startupinfo.wShowWindow = subprocess.SW_HIDE
         return startupinfo
     
-    def search(self, query):
-        """Try multiple search methods until one works"""
+    def search(self, query, embed_query=None):
+        """Search the web, serving repeat queries from the result cache
+
+        embed_query, if given, returns the caller's unit embedding of the
+        query (or None) so reranking doesn't embed the query a second time.
+        """
+        key = self._cache_key(query)
+        cached = self._result_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self._result_cache.move_to_end(key)
+            return cached[1]
         
-        # Method 1: DuckDuckGo HTML (most reliable, no blocking)
-        try:
-            result = self._search_ddg_html(query)
-            if result and "error" not in result.lower() and len(result) > 50:
-                return result
-        except Exception as e:
-            pass
+        result = self._search_engines(query, embed_query)
         
-        # Method 2: Google scraping
-        try:
-            result = self._search_google(query)
-            if result and "error" not in result.lower() and len(result) > 50:
-                return result
-        except Exception as e:
-            pass
+        if self._is_usable(result):
+            self._result_cache[key] = (time.monotonic() + self._cache_ttl(key[0]), result)
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > config.SEARCH_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
         
-        # Method 3: Bing scraping
-        try:
-            result = self._search_bing(query)
-            if result and "error" not in result.lower() and len(result) > 50:
-                return result
-        except Exception as e:
-            pass
+        return result
+    
+    def _cache_key(self, query):
+        """Normalized query plus the current UTC hour"""
+        normalized = " ".join(query.lower().split())
+        return normalized, datetime.now(timezone.utc).strftime("%Y%m%d%H")
+    
+    def _cache_ttl(self, normalized_query):
+        """Fast-moving topics expire sooner"""
+        if "weather" in normalized_query or "forecast" in normalized_query:
+            return config.SEARCH_CACHE_TTL_WEATHER
+        if "news" in normalized_query or "headline" in normalized_query:
+            return config.SEARCH_CACHE_TTL_NEWS
+        return config.SEARCH_CACHE_TTL
+    
+    def _search_engines(self, query, embed_query=None):
+        """Try multiple search methods until one works"""
+        self._bucket.acquire()
         
-        # Method 4: Brave Search (good for crypto/finance)
-        try:
-            result = self._search_brave(query)
-            if result and "error" not in result.lower() and len(result) > 50:
-                return result
-        except Exception as e:
-            pass
+        methods = [
+            (self._search_ddg_html, "DuckDuckGo"),  # Method 1: DuckDuckGo HTML (most reliable, no blocking)
+            (self._search_google, "Google"),        # Method 2: Google scraping
+            (self._search_bing, "Bing"),            # Method 3: Bing scraping
+            (self._search_brave, "Brave"),          # Method 4: Brave Search (good for crypto/finance)
+        ]
+        
+        # Engines return raw results; only the one we use gets ranked and formatted
+        if self._executor:
+            # Fire every engine at once and take the first usable answer - slow engines don't hold up the turn
+            futures = {self._executor.submit(method, query): source for method, source in methods}
+            for future in as_completed(futures):
+                try:
+                    result = self._format_results(future.result(), futures[future], query, embed_query)
+                except Exception:
+                    continue
+                if self._is_usable(result):
+                    # Engines still queued behind other searches never start; running ones finish unread
+                    for pending in futures:
+                        pending.cancel()
+                    return result
+        else:
+            for method, source in methods:
+                try:
+                    result = self._format_results(method(query), source, query, embed_query)
+                except Exception:
+                    continue
+                if self._is_usable(result):
+                    return result
         
         return "Search temporarily unavailable. Please try again in a moment."
     
+    def _is_usable(self, result):
+        """Check that a search method returned real results"""
+        return bool(result) and "error" not in result.lower() and len(result) > 50
+    
+    def _parse_html(self, html):
+        """Parse a results page (bs4 is imported on first use to keep startup fast)"""
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+    
     def _search_ddg_html(self, query):
         """Scrape DuckDuckGo HTML (most reliable)"""
         try:
             encoded_query = urllib.parse.quote_plus(query)
             url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
             
-            response = requests.post(
+            response = self._get_session().post(
                 url,
                 data={'q': query, 'b': '', 'kl': 'us-en'},
                 headers=self._get_headers(),
@@ -119,7 +215,7 @@ class WebSearch:
             if response.status_code != 200:
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             results = []
             for result in soup.find_all('div', class_='result'):
@@ -145,7 +241,7 @@ class WebSearch:
             if not results:
                 return None
             
-            return self._format_results(results[:self.max_results], "DuckDuckGo")
+            return results
             
         except Exception as e:
             return None
@@ -156,7 +252,7 @@ class WebSearch:
             encoded_query = urllib.parse.quote_plus(query)
             url = f"https://www.google.com/search?q={encoded_query}&num={self.max_results}"
             
-            response = requests.get(
+            response = self._get_session().get(
                 url,
                 headers=self._get_headers(),
                 timeout=self.timeout
@@ -165,7 +261,7 @@ class WebSearch:
             if response.status_code != 200:
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             results = []
             
@@ -210,7 +306,7 @@ class WebSearch:
             if not results:
                 return None
             
-            return self._format_results(results[:self.max_results], "Google")
+            return results
             
         except Exception as e:
             return None
@@ -221,7 +317,7 @@ class WebSearch:
             encoded_query = urllib.parse.quote_plus(query)
             url = f"https://www.bing.com/search?q={encoded_query}&count={self.max_results}"
             
-            response = requests.get(
+            response = self._get_session().get(
                 url,
                 headers=self._get_headers(),
                 timeout=self.timeout
@@ -230,7 +326,7 @@ class WebSearch:
             if response.status_code != 200:
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             results = []
             for li in soup.find_all('li', class_='b_algo'):
@@ -264,7 +360,7 @@ class WebSearch:
             if not results:
                 return None
             
-            return self._format_results(results[:self.max_results], "Bing")
+            return results
             
         except Exception as e:
             return None
@@ -275,7 +371,7 @@ class WebSearch:
             encoded_query = urllib.parse.quote_plus(query)
             url = f"https://search.brave.com/search?q={encoded_query}"
             
-            response = requests.get(
+            response = self._get_session().get(
                 url,
                 headers=self._get_headers(),
                 timeout=self.timeout
@@ -284,7 +380,7 @@ class WebSearch:
             if response.status_code != 200:
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             results = []
             
@@ -322,32 +418,138 @@ class WebSearch:
             if not results:
                 return None
             
-            return self._format_results(results[:self.max_results], "Brave")
+            return results
             
         except Exception as e:
             return None
     
-    def _format_results(self, results, source):
+    def _result_target(self, url):
+        """Split a result URL, unwrapping DuckDuckGo/Google redirect links"""
+        parts = urllib.parse.urlsplit(url)
+        params = urllib.parse.parse_qs(parts.query)
+        target = params.get('uddg') or (params.get('q') if parts.path == '/url' else None)
+        if target:
+            parts = urllib.parse.urlsplit(target[0])
+        return parts
+    
+    def _dedupe_key(self, parts):
+        """Normalized URL used to spot the same page listed twice"""
+        if not parts.hostname:
+            return None
+        host = parts.hostname.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        return host + parts.path.rstrip('/').lower()
+    
+    def _is_credible(self, parts):
+        """Check the URL's domain (or any parent domain) against CREDIBLE_DOMAINS"""
+        labels = (parts.hostname or '').lower().split('.')
+        return any('.'.join(labels[i:]) in self.credible_domains for i in range(len(labels) - 1))
+    
+    def _embed_texts(self, texts):
+        """Embed texts in one batch call, reusing cached vectors (rows are unit length)"""
+        keys = [hashlib.sha1(text.encode('utf-8')).hexdigest() for text in texts]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._embedding_cache))
+        
+        if missing:
+            texts_by_key = dict(zip(keys, texts))
+            vectors = self.embed_fn([texts_by_key[key] for key in missing])
+            for key, vector in zip(missing, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                self._embedding_cache[key] = vector / norm if norm else vector
+            while len(self._embedding_cache) > config.SEARCH_EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        
+        for key in keys:
+            self._embedding_cache.move_to_end(key)
+        return np.stack([self._embedding_cache[key] for key in keys])
+    
+    def _relevance_order(self, query, results, credible, embed_query=None):
+        """Rank results by embedding similarity to the query blended with credibility"""
+        texts = [f"{r.get('title', '')} {r.get('snippet', '')}" for r in results]
+        
+        # Reuse the caller's query vector when there is one - only the results need embedding then
+        query_vector = embed_query() if embed_query else None
+        if query_vector is None:
+            matrix = self._embed_texts([query] + texts)
+            query_vector, matrix = matrix[0], matrix[1:]
+        else:
+            matrix = self._embed_texts(texts)
+        
+        similarity = matrix @ query_vector
+        weight = config.SEARCH_RERANK_WEIGHT
+        scores = weight * similarity + (1 - weight) * np.asarray(credible, dtype=np.float32)
+        return [int(i) for i in np.argsort(-scores, kind='stable')]
+    
+    def _compress_snippet(self, snippet, query_terms):
+        """Keep the sentence that best matches the query (plus its neighbours)"""
+        limit = config.SEARCH_SNIPPET_CHARS
+        if len(snippet) <= limit:
+            return snippet
+        
+        sentences = re.split(r'(?<=[.!?])\s+', snippet)
+        if len(sentences) > 1 and query_terms:
+            lowered = [sentence.lower() for sentence in sentences]
+            best = max(range(len(sentences)), key=lambda i: sum(lowered[i].count(t) for t in query_terms))
+            snippet = " ".join(sentences[max(0, best - 1):best + 2])
+        
+        if len(snippet) > limit:
+            snippet = snippet[:limit].rsplit(' ', 1)[0] + "..."
+        return snippet
+    
+    def _format_results(self, results, source, query="", embed_query=None):
         """Format search results - clean and concise for LLM processing"""
         if not results:
             return None
         
+        # Parse each URL once; dedupe and credibility both work from it
+        seen = set()
+        unique = []
+        credible = []
+        for result in results:
+            parts = self._result_target(result.get('url', ''))
+            key = self._dedupe_key(parts)
+            if key and key in seen:
+                continue
+            seen.add(key)
+            unique.append(result)
+            credible.append(self._is_credible(parts))
+        
+        # Credible sources first (stable, so engine ranking is kept otherwise)
+        order = sorted(range(len(unique)), key=lambda i: not credible[i])
+        
+        # Prefer query relevance when an embedder is available
+        if self.embed_fn and query and len(unique) > 1:
+            try:
+                order = self._relevance_order(query, unique, credible, embed_query)
+            except Exception:
+                # Embedding model unavailable - keep the credibility order from now on
+                self.embed_fn = None
+        results = [unique[i] for i in order[:self.max_results]]
+        
         formatted = []
+        query_terms = [term for term in query.lower().split() if len(term) > 2]
         
         for i, result in enumerate(results, 1):
             title = result.get('title', 'No title')
             snippet = result.get('snippet', 'No description')
             
-            # Clean up the snippet
+            # Clean up the snippet and keep only the part relevant to the query
             snippet = snippet.replace('\n', ' ').strip()
+            snippet = self._compress_snippet(snippet, query_terms)
             
             # For crypto queries, prioritize results with numbers/prices
-            if any(word in title.lower() or word in snippet.lower() 
-                   for word in ['bitcoin', 'btc', 'crypto', 'price', '$']):
+            if PRICE_KEYWORD_MATCHER.search(f"{title}\n{snippet}".lower()) is not None:
                 formatted.insert(0, f"{title}. {snippet}")
             else:
                 formatted.append(f"{title}. {snippet}")
         
+        # Enforce the prompt budget (~4 chars per token) by dropping the lowest-ranked results
+        budget = config.SEARCH_CONTEXT_TOKENS * 4
+        while len(formatted) > 1 and len("\n\n".join(formatted)) > budget:
+            formatted.pop()
+        
         return "\n\n".join(formatted)
     
     def search_with_retry(self, query, max_retries=3):
@@ -355,7 +557,7 @@ class WebSearch:
         for attempt in range(max_retries):
             try:
                 result = self.search(query)
-                if result and "error" not in result.lower() and len(result) > 50:
+                if self._is_usable(result):
                     return result
                 
                 if attempt < max_retries - 1:
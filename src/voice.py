@@ -6,7 +6,14 @@ import subprocess
 import wave
 import json
 import platform
+import queue
+import re
+import struct
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import config
 
 # Audio playback
 AUDIO_PLAYBACK = False
@@ -26,7 +33,11 @@ except ImportError:
     pass
 
 
-def list_microphones():
+# End of a complete sentence in streamed text
+SENTENCE_BOUNDARY = re.compile(r'[.!?](?=\s)|\n')
+
+
+def list_microphones(show=True):
     """List all available microphones"""
     if not SPEECH_RECOGNITION_AVAILABLE:
         return []
@@ -34,14 +45,32 @@ def list_microphones():
     mic_list = []
     for index, name in enumerate(sr.Microphone.list_microphone_names()):
         mic_list.append((index, name))
-        print(f"  [{index}] {name}")
+        if show:
+            print(f"  [{index}] {name}")
     return mic_list
 
 
+def microphone_device_count():
+    """Number of audio devices PortAudio reports - cheap compared to listing them"""
+    if not SPEECH_RECOGNITION_AVAILABLE:
+        return None
+    
+    try:
+        import pyaudio
+        audio = pyaudio.PyAudio()
+        try:
+            return audio.get_device_count()
+        finally:
+            audio.terminate()
+    except Exception:
+        return None
+
+
 class PiperVoice:
     """Lightning-fast TTS using Piper - OPTIMIZED VERSION"""
     
-    def __init__(self, model_name="en_GB-alan-low", microphone_index=None):
+    def __init__(self, model_name="en_GB-alan-low", microphone_index=None, asr_backend="google",
+                 whisper_model="base.en", whisper_compute_type="int8", porcupine_access_key=None):
         self.model_name = model_name  # Using "low" quality for SPEED
         self.microphone_index = microphone_index
         self.system = platform.system()
@@ -78,6 +107,96 @@ class PiperVoice:
             self.recognizer.energy_threshold = 3000  # Lower = more sensitive
             self.recognizer.dynamic_energy_threshold = True
             self.recognizer.pause_threshold = 0.8    # Shorter pause = faster response
+        
+        # Ambient noise is measured once; dynamic_energy_threshold tracks it afterwards
+        self.calibrated = False
+        
+        # Background capture for continuous listening - phrases recorded while paused are dropped
+        self._capture_thread = None
+        self._capture_stop = threading.Event()
+        self._phrase_queue = queue.Queue()
+        self.capture_paused = threading.Event()
+        self._pause_count = 0  # Bumped by every pause, so a phrase that spans one can be spotted
+        
+        # Porcupine keyword spotting - runs on raw frames, so no ASR until the wake word is heard
+        self.porcupine = None
+        if porcupine_access_key:
+            self.porcupine = self._load_porcupine(porcupine_access_key)
+        
+        # Local Whisper transcription skips the round trip to Google
+        self.whisper = None
+        if asr_backend == "whisper" and self.recognizer:
+            self.whisper = self._load_whisper(whisper_model, whisper_compute_type)
+    
+    def _load_whisper(self, model_size, compute_type):
+        """Load a faster-whisper model once, or None to fall back to Google"""
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            print("faster-whisper not installed - using Google speech recognition")
+            return None
+        
+        try:
+            return WhisperModel(model_size, device="cpu", compute_type=compute_type)
+        except Exception as e:
+            print(f"Whisper failed to load ({e}) - using Google speech recognition")
+            return None
+    
+    def _load_porcupine(self, access_key):
+        """Create a Porcupine detector for "jarvis", or None to fall back to ASR polling"""
+        try:
+            import pvporcupine
+        except ImportError:
+            print("pvporcupine not installed - wake word detection will use speech recognition")
+            return None
+        
+        try:
+            return pvporcupine.create(access_key=access_key, keywords=['jarvis'])
+        except Exception as e:
+            print(f"Porcupine failed to start ({e}) - wake word detection will use speech recognition")
+            return None
+    
+    def wait_for_wake_word(self):
+        """Block until Porcupine hears the wake word"""
+        import pyaudio
+        
+        frame_length = self.porcupine.frame_length
+        audio = pyaudio.PyAudio()
+        stream = audio.open(
+            rate=self.porcupine.sample_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            frames_per_buffer=frame_length,
+            input_device_index=self.microphone_index
+        )
+        
+        try:
+            while True:
+                pcm = stream.read(frame_length, exception_on_overflow=False)
+                if self.porcupine.process(struct.unpack_from(f"{frame_length}h", pcm)) >= 0:
+                    return True
+        finally:
+            # Release the device so listen() can open it for the command
+            stream.close()
+            audio.terminate()
+    
+    def _transcribe(self, audio):
+        """Turn captured audio into text with the configured backend"""
+        if self.whisper is None:
+            return self.recognizer.recognize_google(audio)
+        
+        import numpy as np
+        
+        # 16 kHz mono 16-bit PCM -> float32 in [-1, 1], as Whisper expects
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        
+        segments, _ = self.whisper.transcribe(samples, language="en", beam_size=1, vad_filter=True)
+        text = "".join(segment.text for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
     
     def _find_piper(self):
         """Find or guide user to install piper"""
@@ -203,6 +322,25 @@ class PiperVoice:
             print(f"      Save to: {config_path}")
             raise
     
+    def _microphone(self):
+        """Open the configured microphone"""
+        if self.microphone_index is not None:
+            return sr.Microphone(device_index=self.microphone_index)
+        return sr.Microphone()
+    
+    def calibrate(self, duration=0.5):
+        """Measure ambient noise once so each listen can start recording immediately"""
+        if not self.recognizer:
+            return False
+        
+        try:
+            with self._microphone() as source:
+                self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+            self.calibrated = True
+        except Exception as e:
+            print(f"(calibration failed: {e})")
+        return self.calibrated
+    
     def _get_startup_info(self):
         """Get Windows STARTUPINFO to hide console window"""
         if self.system != "Windows":
@@ -218,8 +356,9 @@ class PiperVoice:
         if not text:
             return
         
-        # Use temp file that gets cleaned up automatically
-        temp_file = os.path.join(self.temp_dir, "jarvis_speech.wav")
+        # Own temp file per call - overlapping speak() calls must not share one
+        with tempfile.NamedTemporaryFile(suffix=".wav", dir=self.temp_dir, delete=False) as f:
+            temp_file = f.name
         
         try:
             # Generate speech with Piper (lightning fast!)
@@ -260,24 +399,23 @@ class PiperVoice:
                 sd.play(data, samplerate)
                 if wait:
                     sd.wait()  # Block until playback finishes
-            
-            # Cleanup
-            try:
-                os.remove(temp_file)
-            except:
-                pass
                 
         except subprocess.TimeoutExpired:
             pass
         except Exception:
             pass
+        finally:
+            # Cleanup - audio is already in memory once sf.read returns
+            try:
+                os.remove(temp_file)
+            except:
+                pass
     
     def speak_streaming(self, text):
         """Stream response sentence by sentence with proper waiting"""
         if not text:
             return
         
-        import re
         sentences = re.split(r'(?<=[.!?])\s+', text)
         
         for i, sentence in enumerate(sentences):
@@ -293,15 +431,12 @@ class PiperVoice:
             return None
         
         try:
-            mic_kwargs = {}
-            if self.microphone_index is not None:
-                mic_kwargs['device_index'] = self.microphone_index
-                
-            with sr.Microphone(**mic_kwargs) as source:
+            with self._microphone() as source:
                 print("\nListening...", end=" ", flush=True)
                 
                 # Faster ambient noise adjustment
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
+                if not self.calibrated:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
                 
                 audio = self.recognizer.listen(
                     source,
@@ -311,7 +446,7 @@ class PiperVoice:
                 
                 print("Processing...", end=" ", flush=True)
                 
-                text = self.recognizer.recognize_google(audio)
+                text = self._transcribe(audio)
                 print(f"Done\nYou: {text}")
                 return text
                 
@@ -328,19 +463,89 @@ class PiperVoice:
             print(f"(error: {e})")
             return None
     
+    def start_background_capture(self):
+        """Record phrases on a thread so the next one is captured while the last is transcribed"""
+        if not self.recognizer or self._capture_thread is not None:
+            return
+        
+        self._capture_stop.clear()
+        self._phrase_queue = queue.Queue()
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+    
+    def stop_background_capture(self):
+        """Stop the capture thread started by start_background_capture"""
+        if self._capture_thread is None:
+            return
+        
+        self._capture_stop.set()
+        self._capture_thread.join(timeout=2)
+        self._capture_thread = None
+    
+    def _capture_loop(self):
+        """Producer: push each recorded phrase onto the queue"""
+        try:
+            with self._microphone() as source:
+                if not self.calibrated:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
+                
+                while not self._capture_stop.is_set():
+                    paused = self.capture_paused.is_set()
+                    pauses = self._pause_count
+                    try:
+                        audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=None)
+                    except sr.WaitTimeoutError:
+                        continue
+                    
+                    # Drop anything recorded while paused at any point - it may hold our own speech
+                    if paused or self.capture_paused.is_set() or self._pause_count != pauses:
+                        continue
+                    self._phrase_queue.put(audio)
+        except Exception as e:
+            print(f"(capture error: {e})")
+        finally:
+            self._phrase_queue.put(None)  # Wake the consumer so it can fall back
+    
+    def pause_capture(self):
+        """Stop queueing phrases, including the one being recorded right now"""
+        self._pause_count += 1
+        self.capture_paused.set()
+    
+    def resume_capture(self):
+        """Queue phrases again - only ones that start after this call"""
+        self.capture_paused.clear()
+    
     def listen_continuous(self, timeout=None):
         """Continuously listen and return full phrase - OPTIMIZED"""
         if not self.recognizer:
             return None
         
+        # Consumer side of background capture
+        if self._capture_thread is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                try:
+                    # Short waits keep Ctrl+C responsive
+                    audio = self._phrase_queue.get(timeout=0.5)
+                    break
+                except queue.Empty:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return None
+            
+            if audio is None:
+                self._capture_thread = None
+                return None
+            
+            try:
+                return self._transcribe(audio).lower()
+            except Exception:
+                return None
+        
         try:
-            mic_kwargs = {}
-            if self.microphone_index is not None:
-                mic_kwargs['device_index'] = self.microphone_index
-                
-            with sr.Microphone(**mic_kwargs) as source:
+            with self._microphone() as source:
                 # Faster ambient noise adjustment
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
+                if not self.calibrated:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
                 
                 audio = self.recognizer.listen(
                     source,
@@ -349,7 +554,7 @@ class PiperVoice:
                 )
                 
                 try:
-                    text = self.recognizer.recognize_google(audio)
+                    text = self._transcribe(audio)
                     return text.lower()
                 except sr.UnknownValueError:
                     return None
@@ -407,17 +612,30 @@ class PiperVoice:
 class VoiceAssistant:
     """Voice wrapper for Jarvis with Piper TTS - OPTIMIZED VERSION"""
     
-    def __init__(self, jarvis_assistant, voice_enabled=True, voice_mode="piper", microphone_index=None):
+    def __init__(self, jarvis_assistant, voice_enabled=True, voice_mode="piper", microphone_index=None,
+                 asr_backend="google", whisper_model="base.en", whisper_compute_type="int8",
+                 porcupine_access_key=None):
         self.assistant = jarvis_assistant
         self.voice_enabled = voice_enabled
         self.voice = None
         self.wake_word = "jarvis"
         self.microphone_index = microphone_index
         
+        # One worker so utterances play in order without blocking the caller
+        self._speech_queue = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self._pending_text = ""
+        
         if voice_enabled:
             try:
                 # Use FAST voice model by default for speed
-                self.voice = PiperVoice(model_name="en_GB-alan-low", microphone_index=microphone_index)
+                self.voice = PiperVoice(
+                    model_name="en_GB-alan-low",
+                    microphone_index=microphone_index,
+                    asr_backend=asr_backend,
+                    whisper_model=whisper_model,
+                    whisper_compute_type=whisper_compute_type,
+                    porcupine_access_key=porcupine_access_key
+                )
                 print("✓ Fast voice system ready (optimized)")
             except Exception as e:
                 print(f"Voice init failed: {e}")
@@ -433,6 +651,65 @@ class VoiceAssistant:
         except Exception as e:
             print(f"Speech failed: {e}")
     
+    def prewarm(self):
+        """One-time setup before the first utterance: calibrate the microphone"""
+        if self.voice_enabled and self.voice:
+            self.voice.calibrate()
+    
+    def speak_response_async(self, text, user_query=""):
+        """Queue the response for speech and return immediately"""
+        if not self.voice_enabled or not self.voice or not text.strip():
+            return None
+        return self._speech_queue.submit(self.speak_response, text, user_query)
+    
+    def stream_response(self, text):
+        """Feed streamed text - each completed sentence is queued for speech"""
+        self._pending_text += text
+        
+        boundary = None
+        for boundary in SENTENCE_BOUNDARY.finditer(self._pending_text):
+            pass
+        if boundary:
+            self.speak_response_async(self._pending_text[:boundary.end()])
+            self._pending_text = self._pending_text[boundary.end():]
+    
+    def finish_response(self):
+        """Queue whatever is left of a streamed response"""
+        text, self._pending_text = self._pending_text, ""
+        return self.speak_response_async(text)
+    
+    def wait_for_speech(self):
+        """Block until everything queued so far has been spoken"""
+        self._speech_queue.submit(lambda: None).result()
+    
+    def respond(self, user_input):
+        """Print and speak the reply - each sentence is spoken as soon as it has streamed"""
+        print("\nJarvis: ", end="", flush=True)
+        streamed = []
+        
+        def on_token(text):
+            streamed.append(text)
+            print(text, end="", flush=True)
+            self.stream_response(text)
+        
+        response = self.assistant.chat(user_input, on_token=on_token if config.STREAM_RESPONSES else None)
+        
+        # Print the full response unless it was already streamed verbatim
+        if not streamed:
+            print(response)
+        elif "".join(streamed) != response:
+            print(f"\n{response}")
+        else:
+            print()
+        
+        # Sentences were queued while streaming, otherwise queue the whole response
+        if streamed:
+            self.finish_response()
+        else:
+            self.speak_response_async(response, user_query=user_input)
+        self.wait_for_speech()
+        return response
+    
     def voice_chat_loop(self):
         """Interactive voice conversation"""
         if not self.voice_enabled or not self.voice:
@@ -451,11 +728,7 @@ class VoiceAssistant:
                 self.voice.speak("Goodbye, sir.", wait=True)
                 break
             
-            print("\nJarvis: ", end="", flush=True)
-            response = self.assistant.chat(user_input)
-            print(response)
-            
-            self.speak_response(response, user_input)
+            self.respond(user_input)
     
     def wake_word_mode(self):
         """Continuous listening mode - OPTIMIZED WITH COOLDOWN"""
@@ -467,10 +740,15 @@ class VoiceAssistant:
         print("\nListening continuously... Say 'Jarvis' followed by your command")
         print("(Press Ctrl+C to exit)\n")
         
-        import time
+        if self.voice.porcupine is not None:
+            self._porcupine_wake_loop()
+            return
+        
         last_command_time = 0
         cooldown_period = 2.0  # Prevent duplicate commands within 2 seconds
         
+        self.voice.start_background_capture()
+        
         while True:
             try:
                 heard_text = self.voice.listen_continuous(timeout=None)
@@ -492,15 +770,9 @@ class VoiceAssistant:
                         print(f"\nDetected: {heard_text}")
                         print(f"Command: {command}")
                         
-                        if any(word in command.lower() for word in ['exit', 'goodbye', 'quit', 'stop', 'deactivate']):
-                            self.voice.speak("Continuous listening deactivated.", wait=True)
+                        if not self._run_wake_command(command):
                             break
                         
-                        print("\nJarvis: ", end="", flush=True)
-                        response = self.assistant.chat(command)
-                        print(response)
-                        self.speak_response(response, command)
-                        
                         print("\nListening...")
                     else:
                         print(f"\nHeard: {heard_text}")
@@ -512,7 +784,48 @@ class VoiceAssistant:
             except Exception as e:
                 print(f"\nError in wake word mode: {e}")
                 continue
+        
+        self.voice.stop_background_capture()
+    
+    def _porcupine_wake_loop(self):
+        """Wake word mode with Porcupine - full ASR only runs for the command after the wake word"""
+        while True:
+            try:
+                self.voice.wait_for_wake_word()
+                
+                command = self.voice.listen(timeout=5)
+                if not command:
+                    continue
+                
+                if not self._run_wake_command(command):
+                    break
+                
+                print("\nListening...")
+                
+            except KeyboardInterrupt:
+                print("\n\nContinuous listening stopped.")
+                break
+            except Exception as e:
+                print(f"\nError in wake word mode: {e}")
+                continue
+    
+    def _run_wake_command(self, command):
+        """Answer a command heard in wake word mode - returns False to leave the mode"""
+        if any(word in command.lower() for word in ['exit', 'goodbye', 'quit', 'stop', 'deactivate']):
+            self.voice.speak("Continuous listening deactivated.", wait=True)
+            return False
+        
+        # Don't capture our own reply as the next command
+        self.voice.pause_capture()
+        try:
+            self.respond(command)
+        finally:
+            self.voice.resume_capture()
+        return True
     
     def shutdown(self):
-        """Cleanup"""
-        pass
\ No newline at end of file
+        """Cleanup - let queued speech finish"""
+        self._speech_queue.shutdown(wait=True)
+        if self.voice and self.voice.porcupine is not None:
+            self.voice.porcupine.delete()
+            self.voice.porcupine = None
\ No newline at end of file
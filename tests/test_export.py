@@ -0,0 +1,61 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.assistant import JarvisAssistant
+from src import modular_memory
+from src.modular_memory import ModularMemorySystem, ORJSON_AVAILABLE
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        os.makedirs("jarvis_data")
+
+        # Only the memory system is needed to export
+        self.assistant = JarvisAssistant.__new__(JarvisAssistant)
+        self.assistant.memory = ModularMemorySystem(data_dir=os.path.join(self.tmp, "jarvis_data"))
+        self.assistant.memory.storage.save_fact("user likes tea", "preferences")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def test_default_export_is_indented_json(self):
+        filepath = self.assistant.export_for_finetuning()
+        self.assertTrue(filepath.endswith(".json"))
+
+        with open(filepath, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["metadata"]["format"], "jarvis_v1")
+        self.assertEqual(data["metadata"]["total_facts"], 1)
+        self.assertEqual(data["facts"][0]["fact"], "user likes tea")
+
+    @unittest.skipUnless(ORJSON_AVAILABLE, "orjson not installed")
+    def test_default_export_uses_orjson(self):
+        orjson = modular_memory.orjson
+        with mock.patch.object(orjson, "dumps", wraps=orjson.dumps) as dumps:
+            filepath = self.assistant.export_for_finetuning()
+
+        dumps.assert_called_once()
+        self.assertEqual(dumps.call_args.kwargs["option"], orjson.OPT_INDENT_2)
+        with open(filepath, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["facts"][0]["fact"], "user likes tea")
+
+    def test_jsonl_gz_export(self):
+        filepath = self.assistant.export_for_finetuning("./jarvis_data/export.jsonl.gz", {"total_facts": 1})
+
+        with gzip.open(filepath) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[0]["metadata"]["stats"], {"total_facts": 1})
+        self.assertEqual(lines[1]["fact"], "user likes tea")
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,32 @@
+import unittest
+
+from src.assistant import INTENT_CLASSIFIER
+from src.search import WebSearch
+
+
+class IntentClassifierTest(unittest.TestCase):
+    def test_news_request(self):
+        self.assertIn('news', INTENT_CLASSIFIER.classify("give me the news"))
+        self.assertIn('news', INTENT_CLASSIFIER.classify("what are today's headlines?"))
+        self.assertIn('news', INTENT_CLASSIFIER.classify("any newsworthy stories?"))
+
+    def test_decline_needs_whole_word(self):
+        self.assertNotIn('decline', INTENT_CLASSIFIER.classify("i know python"))
+        self.assertNotIn('decline', INTENT_CLASSIFIER.classify("tell me about snow"))
+        self.assertIn('decline', INTENT_CLASSIFIER.classify("no, that's all"))
+
+    def test_plural_and_inflected_keywords_search(self):
+        for query in ("gas prices in texas", "who won the elections", "how are stocks doing",
+                      "is it raining in paris", "any updates on the storms"):
+            with self.subTest(query=query):
+                self.assertIn('search', INTENT_CLASSIFIER.classify(query))
+
+    def test_agrees_with_needs_search(self):
+        search = WebSearch()
+        for query in ("gas prices in texas", "is it raining in paris", "tell me a joke", "i know python"):
+            with self.subTest(query=query):
+                self.assertEqual('search' in INTENT_CLASSIFIER.classify(query), search.needs_search(query))
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
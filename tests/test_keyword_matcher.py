@@ -0,0 +1,47 @@
+import unittest
+
+from src.keyword_matcher import KeywordMatcher, KeywordClassifier
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def test_keywords_are_lowercased(self):
+        matcher = KeywordMatcher(['USD', 'Exchange Rate'])
+        self.assertEqual(matcher.search("usd to eur"), 'usd')
+        self.assertEqual(matcher.search("current exchange rate"), 'exchange rate')
+
+    def test_no_match(self):
+        self.assertIsNone(KeywordMatcher(['weather']).search("tell me a joke"))
+
+
+class KeywordClassifierTest(unittest.TestCase):
+    def test_keywords_are_lowercased(self):
+        classifier = KeywordClassifier({'search': ['USD']})
+        self.assertEqual(classifier.classify("price in usd"), {'search'})
+
+    def test_substrings_match_by_default(self):
+        classifier = KeywordClassifier({'search': ['price', 'storm']})
+        self.assertEqual(classifier.classify("gas prices after the storms"), {'search'})
+        self.assertEqual(classifier.find_keywords("gas prices after the storms"), {'price', 'storm'})
+
+    def test_whole_word_groups(self):
+        classifier = KeywordClassifier({'decline': ['no', 'nope', "i'm good"]}, whole_word_groups=['decline'])
+        self.assertEqual(classifier.classify("i know python"), set())
+        self.assertEqual(classifier.classify("tell me about snow"), set())
+        self.assertEqual(classifier.classify("no thanks"), {'decline'})
+        self.assertEqual(classifier.classify("nope, i'm good."), {'decline'})
+        self.assertEqual(classifier.find_keywords("nope, i'm good."), {'nope', "i'm good"})
+
+    def test_keyword_inside_longer_keyword(self):
+        classifier = KeywordClassifier({'news': ['news', 'news summary'], 'other': ['summary']})
+        self.assertEqual(classifier.find_keywords("news summary please"), {'news', 'news summary', 'summary'})
+        self.assertEqual(classifier.find_keywords("newsletter summary"), {'news', 'summary'})
+
+    def test_mixed_modes(self):
+        classifier = KeywordClassifier({'decline': ['no'], 'search': ['now', 'no']}, whole_word_groups=['decline'])
+        self.assertEqual(classifier.classify("i know"), {'search'})
+        self.assertEqual(classifier.classify("no"), {'decline', 'search'})
+        self.assertEqual(classifier.keywords_by_group("no, not now"), {'decline': {'no'}, 'search': {'no', 'now'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.modular_memory import JSONMemoryBackend
+
+
+class JSONMemoryBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "memory.json")
+        self.backend = JSONMemoryBackend(self.path)
+        for topping in ("cheese", "ham", "olives", "mushrooms", "peppers"):
+            self.backend.save_fact(f"{topping} pizza", "preferences")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_get_facts_counts_access(self):
+        facts = self.backend.get_facts("pizza", limit=5)
+        self.assertEqual(len(facts), 5)
+        self.assertTrue(all(f["access_count"] == 1 for f in facts))
+
+    def test_reads_and_writes_from_threads(self):
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(20):
+                    self.backend.get_facts("pizza")
+            except Exception as e:
+                errors.append(e)
+
+        def writer(n):
+            try:
+                for i in range(20):
+                    self.backend.save_fact(f"toy{n}x{i}", "general")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        # Every pizza fact was read 60 times and the file on disk agrees
+        with open(self.path) as f:
+            saved = json.load(f)
+        pizza = [f for f in saved["facts"] if "pizza" in f["fact"]]
+        self.assertTrue(all(f["access_count"] == 60 for f in pizza))
+        self.assertEqual(len(saved["facts"]), self.backend.count_facts())
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
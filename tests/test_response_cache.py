@@ -0,0 +1,138 @@
+import threading
+import unittest
+from unittest import mock
+
+from src import config
+from src.llm import LLMHandler
+from src.response_cache import ResponseCache, SemanticIndex, NUMPY_AVAILABLE, query_signature
+
+# Stand-in embeddings: the two weather phrasings point the same way, the other city does not
+VECTORS = {
+    "what's the weather in paris": [1.0, 0.0, 0.0],
+    "weather in paris please": [0.99, 0.05, 0.0],
+    "what's the weather in london": [0.97, 0.1, 0.0],
+}
+
+
+def make_handler():
+    """LLMHandler with the configured response cache but no Ollama connection"""
+    handler = LLMHandler.__new__(LLMHandler)
+    handler.primary_model = "test-model"
+    handler.response_cache = ResponseCache(
+        embed_fn=VECTORS.__getitem__,
+        max_entries=config.RESPONSE_CACHE_SIZE,
+        similarity_threshold=config.SEMANTIC_CACHE_THRESHOLD
+    )
+    return handler
+
+
+class QuerySignatureTest(unittest.TestCase):
+    def test_ignores_filler(self):
+        self.assertEqual(query_signature("What's the weather in Paris?"), query_signature("weather in paris please"))
+
+    def test_keeps_names_and_numbers(self):
+        self.assertNotEqual(query_signature("AAPL price"), query_signature("MSFT price"))
+        self.assertNotEqual(query_signature("top 5 movies"), query_signature("top 10 movies"))
+        self.assertNotEqual(query_signature("what's my name"), query_signature("what's your name"))
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class SemanticIndexTest(unittest.TestCase):
+    def test_lookup_requires_equal_tag(self):
+        index = SemanticIndex(similarity_threshold=0.9)
+        vector = SemanticIndex.normalize([1.0, 0.0])
+        index.add(vector, "answer", tag="a")
+        self.assertEqual(index.lookup(vector, "a")[0], "answer")
+        self.assertIsNone(index.lookup(vector, "b")[0])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class ConcurrencyTest(unittest.TestCase):
+    def test_concurrent_puts_and_gets(self):
+        cache = ResponseCache(embed_fn=lambda text: [1.0, float(len(text))], max_entries=8)
+        errors = []
+
+        def worker(name):
+            try:
+                for i in range(500):
+                    key = f"{name}-{i % 20}"
+                    cache.put(key, key, cache.embed(key), tag=name)
+                    cache.get(key)
+                    cache.get_similar(cache.embed(key), tag=name)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in ("chat", "learn", "news")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache._exact), 8)
+        self.assertEqual(len(cache.semantic._vectors), len(cache.semantic._values))
+        self.assertEqual(len(cache.semantic._values), len(cache.semantic._tags))
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class CachedChatTest(unittest.TestCase):
+    def chat(self, handler, text, history=()):
+        return handler.generate_with_history(f"User: {text}", list(history) + [{'role': 'user', 'content': text}], semantic_text=text)
+
+    def test_paraphrase_gets_semantic_hit(self):
+        handler = make_handler()
+        with mock.patch.object(LLMHandler, "_chat", return_value="Sunny, sir.") as chat:
+            first = self.chat(handler, "what's the weather in paris")
+            second = self.chat(handler, "weather in paris please")
+        self.assertEqual(first, second)
+        self.assertEqual(chat.call_count, 1)
+
+    def test_chat_turns_are_deterministic_and_repeat_exactly(self):
+        handler = make_handler()
+        with mock.patch.object(LLMHandler, "_chat", return_value="Sunny, sir.") as chat:
+            self.chat(handler, "what's the weather in paris")
+            self.chat(handler, "what's the weather in paris")
+        self.assertEqual(chat.call_count, 1)
+        options = chat.call_args.args[2]
+        self.assertEqual(options['temperature'], config.DETERMINISTIC_OPTIONS['temperature'])
+        self.assertEqual(options['seed'], config.DETERMINISTIC_OPTIONS['seed'])
+
+    def test_creative_turns_are_sampled_and_not_cached(self):
+        handler = make_handler()
+        with mock.patch.object(LLMHandler, "_chat", side_effect=["One poem.", "Another poem."]) as chat:
+            first = self.chat(handler, "write a poem")
+            second = self.chat(handler, "write a poem")
+        self.assertNotEqual(first, second)
+        self.assertIsNone(chat.call_args.args[2])
+
+    def test_below_threshold_misses(self):
+        handler = make_handler()
+        VECTORS["paris weather"] = [0.8, 0.6, 0.0]  # Same signature, cosine 0.8 with the first phrasing
+        try:
+            with mock.patch.object(LLMHandler, "_chat", side_effect=["Sunny.", "Rain."]) as chat:
+                self.chat(handler, "what's the weather in paris")
+                self.chat(handler, "paris weather")
+        finally:
+            del VECTORS["paris weather"]
+        self.assertEqual(chat.call_count, 2)
+
+    def test_other_city_misses(self):
+        handler = make_handler()
+        with mock.patch.object(LLMHandler, "_chat", side_effect=["Sunny in Paris.", "Rain in London."]) as chat:
+            self.chat(handler, "what's the weather in paris")
+            second = self.chat(handler, "what's the weather in london")
+        self.assertEqual(second, "Rain in London.")
+        self.assertEqual(chat.call_count, 2)
+
+    def test_different_history_misses(self):
+        handler = make_handler()
+        earlier = [{'role': 'user', 'content': 'i am in tokyo'}, {'role': 'assistant', 'content': 'Noted.'},
+                   {'role': 'user', 'content': 'hello'}, {'role': 'assistant', 'content': 'Hello, sir.'}]
+        with mock.patch.object(LLMHandler, "_chat", side_effect=["Sunny.", "Cloudy."]) as chat:
+            self.chat(handler, "what's the weather in paris")
+            self.chat(handler, "weather in paris please", earlier)
+        self.assertEqual(chat.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src import config
+from src.search import WebSearch
+
+
+def results(source):
+    return [{
+        'title': f"{source} weather report",
+        'snippet': f"Sunny and 24 degrees in Paris today according to {source} forecasters.",
+        'url': f"https://{source.lower()}.example.com/weather",
+    }]
+
+
+@unittest.skipUnless(config.SEARCH_PARALLEL, "engines are queried one at a time")
+class EngineFanOutTest(unittest.TestCase):
+    def setUp(self):
+        self.search = WebSearch()
+        self.release = threading.Event()
+
+        def slow(query):
+            self.release.wait(5)
+            return results("DuckDuckGo")
+
+        self.search._search_ddg_html = slow
+        self.search._search_google = mock.Mock(return_value=[])
+        self.search._search_bing = mock.Mock(return_value=results("Bing"))
+        self.search._search_brave = mock.Mock(side_effect=RuntimeError("blocked"))
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_slow_engine_does_not_set_latency(self):
+        start = time.monotonic()
+        result = self.search._search_engines("weather in paris")
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertIn("Bing", result)
+
+    def test_all_engines_failing_reports_unavailable(self):
+        self.search._search_bing.return_value = []
+        self.release.set()
+        self.search._search_ddg_html = mock.Mock(return_value=[])
+        result = self.search._search_engines("weather in paris")
+        self.assertIn("unavailable", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
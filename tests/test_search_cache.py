@@ -0,0 +1,96 @@
+import threading
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+from src import config
+from src.assistant import JarvisAssistant
+from src.response_cache import SemanticIndex, NUMPY_AVAILABLE
+from src.search import WebSearch
+
+# Stand-in query embeddings: every pair below is close enough to pass the threshold
+VECTORS = {
+    "weather in paris": [1.0, 0.0, 0.0],
+    "paris weather today": [0.999, 0.02, 0.0],
+    "weather in london": [0.999, 0.03, 0.0],
+    "aapl stock price": [0.0, 1.0, 0.0],
+    "msft stock price": [0.0, 0.999, 0.03],
+}
+
+
+def make_assistant():
+    """Assistant with only the search answer cache set up"""
+    assistant = JarvisAssistant.__new__(JarvisAssistant)
+    assistant.personality = None
+    assistant.conversation_history = []
+    assistant.search_cache = OrderedDict()
+    assistant._search_index = SemanticIndex(50, config.SEARCH_SEMANTIC_THRESHOLD)
+    assistant._query_vector = (None, None)
+    assistant._query_vector_lock = threading.Lock()
+    assistant._search_db = None
+    assistant.llm = mock.Mock()
+    assistant.llm.embed.side_effect = VECTORS.__getitem__
+    assistant.llm.generate.side_effect = lambda prompt, **kwargs: f"answer {len(assistant.search_cache)}"
+    assistant.search = mock.Mock()
+    assistant.search.search.return_value = "Search results: sunny"
+    return assistant
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class SearchSemanticCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.assistant = make_assistant()
+
+    def ask(self, query):
+        return self.assistant._handle_search_query(query)
+
+    def test_paraphrase_reuses_answer(self):
+        first = self.ask("weather in paris")
+        self.assertEqual(self.ask("paris weather today"), first)
+        self.assertEqual(self.assistant.search.search.call_count, 1)
+
+    def test_other_city_searches_again(self):
+        first = self.ask("weather in paris")
+        self.assertNotEqual(self.ask("weather in london"), first)
+        self.assertEqual(self.assistant.search.search.call_count, 2)
+
+    def test_other_ticker_searches_again(self):
+        first = self.ask("aapl stock price")
+        self.assertNotEqual(self.ask("msft stock price"), first)
+        self.assertEqual(self.assistant.search.search.call_count, 2)
+
+    def test_empty_index_skips_embedding(self):
+        self.assertIsNone(self.assistant._cached_search_answer("weather in paris"))
+        self.assistant.llm.embed.assert_not_called()
+
+    def test_exact_lookup_does_not_embed(self):
+        self.ask("weather in paris")
+        self.assistant.llm.embed.reset_mock()
+        self.assertIsNone(self.assistant._cached_search_answer("paris weather today", semantic=False))
+        self.assistant.llm.embed.assert_not_called()
+
+    @unittest.skipUnless(config.SEARCH_RERANK, "search reranking disabled")
+    def test_reranker_reuses_query_vector(self):
+        search = WebSearch(embed_fn=mock.Mock(side_effect=lambda texts: [[0.0, 1.0, 0.0] for _ in texts]))
+        search._search_ddg_html = mock.Mock(return_value=[
+            {'title': "Paris forecast", 'snippet': "Sunny and 24 degrees all afternoon.", 'url': "https://a.example.com"},
+            {'title': "Paris weather", 'snippet': "Clear skies expected through the evening.", 'url': "https://b.example.com"},
+        ])
+        search._search_google = search._search_bing = search._search_brave = mock.Mock(return_value=[])
+        self.assistant.search = search
+
+        self.ask("weather in paris")
+
+        embedded = [c.args[0] for c in self.assistant.llm.embed.call_args_list]
+        embedded += [text for c in search.embed_fn.call_args_list for text in c.args[0]]
+        self.assertEqual(embedded.count("weather in paris"), 1)
+
+    def test_answer_from_chat_is_not_looked_up_again(self):
+        with mock.patch.object(self.assistant, "_cached_search_answer") as lookup:
+            answer = self.assistant._handle_search_query("weather in paris", cached_result="sunny")
+        self.assertEqual(answer, "sunny")
+        lookup.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from src import config, voice
+from src.voice import PiperVoice, VoiceAssistant
+
+
+class WaitTimeoutError(Exception):
+    pass
+
+
+def make_voice(phrases):
+    """PiperVoice whose recognizer returns phrases by running each step in turn"""
+    piper = PiperVoice.__new__(PiperVoice)
+    piper.calibrated = True
+    piper._capture_stop = threading.Event()
+    piper._phrase_queue = queue.Queue()
+    piper.capture_paused = threading.Event()
+    piper._pause_count = 0
+    piper._microphone = mock.MagicMock()
+
+    steps = iter(phrases)
+
+    def listen(source, timeout=None, phrase_time_limit=None):
+        step = next(steps, None)
+        if step is None:
+            piper._capture_stop.set()
+            raise WaitTimeoutError()
+        return step(piper)
+
+    piper.recognizer = mock.Mock()
+    piper.recognizer.listen.side_effect = listen
+    return piper
+
+
+def queued(piper):
+    items = []
+    while not piper._phrase_queue.empty():
+        items.append(piper._phrase_queue.get())
+    return items
+
+
+@mock.patch.object(voice, "sr", mock.Mock(WaitTimeoutError=WaitTimeoutError), create=True)
+class CaptureLoopTest(unittest.TestCase):
+    def test_phrases_are_queued(self):
+        piper = make_voice([lambda p: "hello"])
+        piper._capture_loop()
+        self.assertEqual(queued(piper), ["hello", None])
+
+    def test_phrase_spanning_our_speech_is_dropped(self):
+        def overlaps_reply(p):
+            # Reply starts and finishes while this phrase is still being recorded
+            p.pause_capture()
+            p.resume_capture()
+            return "echo of the reply"
+
+        piper = make_voice([overlaps_reply, lambda p: "next command"])
+        piper._capture_loop()
+        self.assertEqual(queued(piper), ["next command", None])
+
+    def test_phrase_started_while_paused_is_dropped(self):
+        def ends_after_resume(p):
+            p.resume_capture()
+            return "tail of the reply"
+
+        piper = make_voice([ends_after_resume, lambda p: "next command"])
+        piper.pause_capture()
+        piper._capture_loop()
+        self.assertEqual(queued(piper), ["next command", None])
+
+
+
+class FakeAssistant:
+    """Streams a two-sentence reply, noting what had been spoken when the first sentence ended"""
+
+    def __init__(self, voice_assistant):
+        self.voice_assistant = voice_assistant
+        self.spoken_mid_reply = None
+
+    def chat(self, user_input, on_token=None):
+        reply = ["Good ", "morning, sir. ", "It is ", "sunny."]
+        if on_token:
+            for token in reply[:2]:
+                on_token(token)
+            self.voice_assistant.wait_for_speech()
+            self.spoken_mid_reply = list(self.voice_assistant.voice.speak_streaming.call_args_list)
+            for token in reply[2:]:
+                on_token(token)
+        return "".join(reply)
+
+
+class RespondTest(unittest.TestCase):
+    def setUp(self):
+        self.voice_assistant = VoiceAssistant(None, voice_enabled=False)
+        self.voice_assistant.voice_enabled = True
+        self.voice_assistant.voice = mock.Mock()
+        self.voice_assistant.assistant = FakeAssistant(self.voice_assistant)
+
+    def tearDown(self):
+        self.voice_assistant.shutdown()
+
+    def spoken(self):
+        return [c.args[0] for c in self.voice_assistant.voice.speak_streaming.call_args_list]
+
+    @unittest.skipUnless(config.STREAM_RESPONSES, "responses are not streamed")
+    def test_first_sentence_is_spoken_while_streaming(self):
+        with mock.patch("builtins.print"):
+            response = self.voice_assistant.respond("weather")
+        self.assertEqual(response, "Good morning, sir. It is sunny.")
+        self.assertEqual(len(self.voice_assistant.assistant.spoken_mid_reply), 1)
+        self.assertEqual("".join(self.spoken()), "Good morning, sir. It is sunny.")
+
+    def test_unstreamed_reply_is_spoken_whole(self):
+        with mock.patch.object(config, "STREAM_RESPONSES", False), mock.patch("builtins.print"):
+            self.voice_assistant.respond("weather")
+        self.assertEqual(self.spoken(), ["Good morning, sir. It is sunny."])
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file